@@ -0,0 +1,299 @@
+"""
+Solver backends behind one balancing interface.
+
+Every backend is called as solve(request, settings) and returns
+(teams, stats). The request dict carries the players, the team count, a
+float score per player and its integer scaling, the locks, partnerships
+and conflicts, and an optional warm-start hint. Backends are registered
+with the constraints they can honour and the module they need, so
+select_backend can pick the fastest one that fits a request and
+benchmarks can run them head-to-head.
+"""
+import importlib.util
+import time
+
+from balancing import (
+    DEFAULT_SOLVER_SETTINGS, balance_with_relations, generate_balanced_teams, greedy_teams, teams_from_assignment
+)
+from features import CORE_SCORE_WEIGHTS, feature_matrix, player_scores
+from swap_search import swap_search
+from partitioning import assignment_spread, partition_balanced
+from result_cache import balance_fingerprint, teams_from_names, teams_to_names
+
+# Rosters from this size (or with this many teams) go to the league LNS
+LEAGUE_PLAYERS = 200
+LEAGUE_TEAMS = 20
+# Below this time budget there is no point in starting a MIP/CP solver
+QUICK_TIME_LIMIT = 0.5
+
+BACKENDS = {}
+
+
+def register_backend(name, solve, locks=False, relations=False, requires=None):
+    """
+    Make a backend available to balance and select_backend
+
+    locks: honours locked players. relations: honours partnerships and
+    conflicts. requires: module that must be importable (e.g. 'ortools').
+    """
+    BACKENDS[name] = {
+        'name': name,
+        'solve': solve,
+        'locks': locks,
+        'relations': relations,
+        'requires': requires
+    }
+
+
+def backend_available(name):
+    """True if the backend is registered and its solver module is installed"""
+    backend = BACKENDS.get(name)
+    if backend is None:
+        return False
+    return backend['requires'] is None or importlib.util.find_spec(backend['requires']) is not None
+
+
+def request_constraints(players, locked_assignments=None, partnerships=None, conflicts=None):
+    """(has_locks, has_relations) restricted to the selected players"""
+    names = {p['name'] for p in players}
+    has_locks = any(name in names for name in (locked_assignments or {}))
+    has_relations = any(
+        name in names and any(other in names for other in others)
+        for relations in (partnerships or {}, conflicts or {})
+        for name, others in relations.items()
+    )
+    return has_locks, has_relations
+
+
+def select_backend(players, num_teams, locked_assignments=None, partnerships=None, conflicts=None, settings=None):
+    """
+    Pick a backend from the constraint mix, roster size and time budget
+
+    - partnerships, conflicts or locks: CBC (swap search for locks alone without PuLP)
+    - league-size rosters or many teams: league LNS
+    - a budget too small to start a solver: exact partition
+    - otherwise CP-SAT, which runs the exact partitioner first anyway
+    """
+    settings = {**DEFAULT_SOLVER_SETTINGS, **(settings or {})}
+    has_locks, has_relations = request_constraints(players, locked_assignments, partnerships, conflicts)
+
+    if has_relations or (has_locks and backend_available('cbc')):
+        return 'cbc'
+    if has_locks:
+        return 'swap search'
+    if len(players) >= LEAGUE_PLAYERS or num_teams >= LEAGUE_TEAMS:
+        return 'league lns'
+    if settings['time_limit'] < QUICK_TIME_LIMIT:
+        return 'exact partition'
+    return 'cp-sat' if backend_available('cp-sat') else 'exact partition'
+
+
+def balance(players, num_teams, locked_assignments=None, partnerships=None, conflicts=None, settings=None,
+            scores=None, hint=None, cache=None, live=None):
+    """
+    Balance players into teams with the backend named in settings['backend']
+
+    'auto' lets select_backend choose. scores is a float score per player
+    (running + goals + skill by default). cache is an optional
+    result_cache.ResultCache; the hint does not take part in the lookup.
+    live is an optional live_solve.LiveSolve: CP-SAT streams its improving
+    lineups to it, the other backends publish their final lineup. Lineups
+    accepted early are not cached.
+
+    Returns (teams, stats); stats always has the keys of
+    balancing.solve_stats plus 'backend' and 'range'.
+    """
+    settings = {**DEFAULT_SOLVER_SETTINGS, **(settings or {})}
+    if len(players) < num_teams:
+        return None, None
+
+    name = settings['backend']
+    if name == 'auto':
+        name = select_backend(players, num_teams, locked_assignments, partnerships, conflicts, settings)
+    if not backend_available(name):
+        raise ValueError(f"Solver backend {name!r} is not available")
+    backend = BACKENDS[name]
+    has_locks, has_relations = request_constraints(players, locked_assignments, partnerships, conflicts)
+    if (has_locks and not backend['locks']) or (has_relations and not backend['relations']):
+        raise ValueError(f"Solver backend {name!r} does not support locks, partnerships or conflicts")
+
+    if scores is None:
+        scores = player_scores(feature_matrix(players), CORE_SCORE_WEIGHTS).tolist()
+    request = {
+        'players': players,
+        'num_teams': num_teams,
+        'scores': scores,
+        'scaled_scores': [round(score * 100) for score in scores],
+        'locked_assignments': locked_assignments or {},
+        'partnerships': partnerships or {},
+        'conflicts': conflicts or {},
+        'hint': hint,
+        'live': live
+    }
+
+    key = None
+    if cache is not None:
+        key = request_fingerprint(
+            players, num_teams, locked_assignments, partnerships, conflicts, settings, scores, name
+        )
+        stored = cache.get(key)
+        if stored is not None:
+            teams = teams_from_names(players, stored['teams'])
+            if teams is not None:
+                return teams, {**stored['stats'], 'cached': True}
+
+    teams, stats = backend['solve'](request, settings)
+    stats['backend'] = name
+    if stats.get('range') is None:
+        stats['range'] = team_range(teams, players, request['scaled_scores'])
+    if live is not None and name != 'cp-sat':
+        live.publish(teams, {**stats, 'bound': None})
+    if cache is not None and not stats.get('stopped_early'):
+        cache.put(key, {'teams': teams_to_names(teams), 'stats': stats})
+    return teams, stats
+
+
+def request_fingerprint(players, num_teams, locked_assignments=None, partnerships=None, conflicts=None,
+                        settings=None, scores=None, backend=None):
+    """
+    Canonical key of a balance() request (result cache and single-flight jobs)
+
+    Identical requests give identical keys whatever the player order. The
+    warm-start hint is not part of the key.
+    """
+    settings = {**DEFAULT_SOLVER_SETTINGS, **(settings or {})}
+    if backend is None:
+        backend = settings['backend']
+        if backend == 'auto':
+            backend = select_backend(players, num_teams, locked_assignments, partnerships, conflicts, settings)
+    if scores is None:
+        scores = player_scores(feature_matrix(players), CORE_SCORE_WEIGHTS).tolist()
+    # The pool and season settings only matter to generate_lineup_pool and season.py
+    key_settings = {k: v for k, v in settings.items() if not k.startswith(('pool_', 'season_'))}
+    key_settings['backend'] = backend
+    key_settings['scores'] = sorted(zip((p['name'] for p in players), (round(score * 100) for score in scores)))
+    return balance_fingerprint(players, num_teams, locked_assignments, partnerships, conflicts, key_settings)
+
+
+def team_range(teams, players, scaled_scores):
+    """max_total - min_total of a lineup, in score points"""
+    score_of = {p['name']: score for p, score in zip(players, scaled_scores)}
+    totals = [sum(score_of[p['name']] for p in team) for team in teams]
+    return (max(totals) - min(totals)) / 100
+
+
+def backend_stats(engine, status, wall_time, settings):
+    """Stats for the backends that do not run CP-SAT"""
+    return {
+        'status': status,
+        'engine': engine,
+        'wall_time': wall_time,
+        'time_limit': settings['time_limit'],
+        'budget_used': min(1.0, wall_time / settings['time_limit']),
+        'num_workers': 1,
+        'random_seed': settings['random_seed'],
+        'warm_start': None
+    }
+
+
+# Backends
+
+def solve_cp_sat(request, settings):
+    """OR-Tools CP-SAT (with the exact partitioner ahead of it when enabled)"""
+    return generate_balanced_teams(
+        request['players'], request['num_teams'], settings, request['hint'], request['scaled_scores'],
+        request['live']
+    )
+
+
+def solve_exact_partition(request, settings):
+    """Balanced differencing, swaps and branch and bound, within the time budget"""
+    scaled_scores, num_teams = request['scaled_scores'], request['num_teams']
+    exact = run_engine(request, partition_balanced, scaled_scores, num_teams, time_limit=settings['time_limit'],
+                       stoppable=False)
+    assignment, spread = exact['assignment'], exact['range']
+    # Keep the caller's lineup if the search budget ran out before matching it
+    if request['hint'] is not None and assignment_spread(scaled_scores, request['hint'], num_teams) < spread:
+        assignment, spread = request['hint'], assignment_spread(scaled_scores, request['hint'], num_teams)
+    stats = backend_stats('exact partition', 'OPTIMAL' if exact['optimal'] else 'FEASIBLE', exact['wall_time'], settings)
+    stats['range'] = spread / 100
+    return teams_from_assignment(request['players'], assignment, num_teams), stats
+
+
+def run_engine(request, fn, *args, stoppable=True, **kwargs):
+    """
+    Run a pure-Python engine for a request
+
+    Under a live solve it goes through live.run_python (a job runs it in a
+    process pool, so it does not hold the server's GIL) and, if stoppable,
+    gets a stop= callable; otherwise it just runs here.
+    """
+    live = request['live']
+    if live is None:
+        return fn(*args, **kwargs)
+    return live.run_python(fn, *args, stoppable=stoppable, **kwargs)
+
+
+def stopped_early(request, stats):
+    """Mark stats of a search its LiveSolve cut short (such results are not cached)"""
+    if request['live'] is not None and request['live'].stop_requested:
+        stats['stopped_early'] = True
+    return stats
+
+
+def solve_league_lns(request, settings):
+    """League-scale large-neighbourhood search: pairwise re-splitting (league.py)"""
+    from league import balance_league
+
+    teams, result = run_engine(
+        request, balance_league, request['players'], request['num_teams'], settings['time_limit'],
+        settings['random_seed'], request['scaled_scores']
+    )
+    stats = backend_stats('league lns', 'OPTIMAL' if result['optimal'] else 'FEASIBLE', result['wall_time'], settings)
+    stats['range'] = result['range']
+    return teams, stopped_early(request, stats)
+
+
+def solve_cbc(request, settings):
+    """PuLP/CBC with partnership indicators and hard conflict separation"""
+    start = time.perf_counter()
+    teams, status = balance_with_relations(
+        request['players'], request['num_teams'], request['partnerships'], request['conflicts'],
+        request['locked_assignments'], request['scores'], request['hint'], settings['time_limit']
+    )
+    if teams is None:
+        raise RuntimeError("CBC found no lineup that satisfies the locks and team sizes")
+    status = 'OPTIMAL' if status == 'Optimal' else 'FEASIBLE'
+    return teams, backend_stats('cbc', status, time.perf_counter() - start, settings)
+
+
+def solve_swap_search(request, settings):
+    """Greedy draft (locks first) improved by vectorized swaps and moves"""
+    players, num_teams = request['players'], request['num_teams']
+    teams = greedy_teams(players, num_teams, request['scores'], request['locked_assignments'])
+    team_of = {p['name']: t for t, team in enumerate(teams) for p in team}
+    assignment = [team_of[p['name']] for p in players]
+    index = {p['name']: i for i, p in enumerate(players)}
+    locked = [index[name] for name in request['locked_assignments'] if name in index]
+
+    assignment, result = run_engine(
+        request, swap_search, request['scaled_scores'], num_teams, assignment, locked, settings['time_limit']
+    )
+    stats = backend_stats('swap search', 'OPTIMAL' if result['optimal'] else 'FEASIBLE', result['wall_time'], settings)
+    stats['range'] = result['range']
+    return teams_from_assignment(players, assignment, num_teams), stopped_early(request, stats)
+
+
+def solve_greedy(request, settings):
+    """Strongest player onto the weakest team"""
+    start = time.perf_counter()
+    teams = greedy_teams(request['players'], request['num_teams'], request['scores'], request['locked_assignments'])
+    return teams, backend_stats('greedy', 'FEASIBLE', time.perf_counter() - start, settings)
+
+
+register_backend('cp-sat', solve_cp_sat, requires='ortools')
+register_backend('exact partition', solve_exact_partition)
+register_backend('league lns', solve_league_lns)
+register_backend('cbc', solve_cbc, locks=True, relations=True, requires='pulp')
+register_backend('swap search', solve_swap_search, locks=True)
+register_backend('greedy', solve_greedy, locks=True)
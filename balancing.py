@@ -0,0 +1,818 @@
+"""
+Team balancing solvers shared by the Streamlit apps.
+
+Nothing in here imports Streamlit, so the solvers can be called from
+scripts and benchmarks as well as from the UI.
+"""
+import os
+
+from partitioning import assignment_spread, partition_balanced, range_lower_bound, total_bounds
+
+# Default CP-SAT settings (the app overrides these from secrets, env vars or the UI)
+DEFAULT_SOLVER_SETTINGS = {
+    'num_workers': os.cpu_count() or 1,  # parallel search workers
+    'random_seed': 0,                    # fixed seed for reproducible runs
+    'time_limit': 10.0,                  # time budget in seconds
+    'deterministic': False,              # reproducible parallel search (interleaved workers)
+    'symmetry_breaking': True,           # fix team labels so equivalent lineups are searched once
+    'warm_start': True,                  # seed the search with the previous or a snake-draft lineup
+    'exact_partition': True,             # try the exact partitioner before starting CP-SAT
+    'pool_size': 10,                     # lineups collected for "Regenerate Different Teams"
+    'pool_tolerance': 1.0,               # how far (in score points) a pooled lineup may be from the best range
+    'pool_diversity': 4,                 # players that must change team between two pooled lineups
+    'pool_time_limit': 2.0,              # extra seconds spent collecting the pool after the main solve
+    'season_tolerance': 1.0,             # score points a season matchday may give up to rotate teammates
+    'season_time_limit': 2.0,            # seconds per matchday when planning a season (season.py)
+    'backend': 'auto',                   # solver backend (see backends.py); 'auto' picks one per request
+    'gap_absolute': 0.0,                 # stop once the range is within this many score points of the lower bound
+    'gap_relative': 0.0                  # ... or within this fraction of the range
+}
+
+
+def read_solver_settings(section=None):
+    """
+    DEFAULT_SOLVER_SETTINGS overridden by section (e.g. a [solver] secrets
+    section), then by SOLVER_<NAME> environment variables
+    """
+    settings = dict(DEFAULT_SOLVER_SETTINGS)
+    section = section or {}
+    for key, default in DEFAULT_SOLVER_SETTINGS.items():
+        raw = section.get(key, os.getenv(f"SOLVER_{key.upper()}"))
+        if raw is None or raw == "":
+            continue
+        try:
+            if isinstance(default, bool):
+                settings[key] = str(raw).strip().lower() in ("1", "true", "yes", "on")
+            else:
+                settings[key] = type(default)(raw)
+        except (TypeError, ValueError):
+            print(f"Ignoring invalid solver setting {key}={raw!r}")
+
+    settings['num_workers'] = max(1, settings['num_workers'])
+    settings['time_limit'] = max(0.1, settings['time_limit'])
+    return settings
+
+
+def scaled_player_scores(players):
+    """Player scores scaled to integers (OR-Tools works with integers)"""
+    from features import CORE_SCORE_WEIGHTS, feature_matrix, player_scores
+
+    scores = player_scores(feature_matrix(players), CORE_SCORE_WEIGHTS)
+    return (scores * 100).astype(int).tolist()
+
+
+def strength_order(scaled_scores):
+    """Player indices strongest first (stable, so ties keep roster order)"""
+    return sorted(range(len(scaled_scores)), key=lambda i: -scaled_scores[i])
+
+
+def team_size_bounds(n_players, num_teams):
+    """Smallest and largest allowed team size"""
+    min_size = n_players // num_teams
+    max_size = min_size + (1 if n_players % num_teams > 0 else 0)
+    return min_size, max_size
+
+
+def snake_draft(scaled_scores, num_teams):
+    """
+    Fast draft assignment: strongest first, picking order reversing every round.
+
+    Returns the team index of every player.
+    """
+    assignment = [0] * len(scaled_scores)
+    for pos, i in enumerate(strength_order(scaled_scores)):
+        round_num, pick = divmod(pos, num_teams)
+        assignment[i] = pick if round_num % 2 == 0 else num_teams - 1 - pick
+    return assignment
+
+
+def assignment_from_teams(players, teams, num_teams):
+    """
+    Team index of every player taken from a previous lineup.
+
+    Players missing from the old lineup join the weakest team that still has
+    room. Returns None when the old lineup cannot be reused (different team
+    count or team sizes that no longer fit).
+    """
+    if not teams or len(teams) != num_teams:
+        return None
+
+    previous = {}
+    for j, team in enumerate(teams):
+        for player in team:
+            previous[player['name']] = j
+
+    min_size, max_size = team_size_bounds(len(players), num_teams)
+    scaled_scores = scaled_player_scores(players)
+    assignment = [previous.get(player['name']) for player in players]
+    sizes = [0] * num_teams
+    totals = [0] * num_teams
+    for i, j in enumerate(assignment):
+        if j is not None:
+            sizes[j] += 1
+            totals[j] += scaled_scores[i]
+
+    for i in strength_order(scaled_scores):
+        if assignment[i] is None:
+            open_teams = [j for j in range(num_teams) if sizes[j] < max_size]
+            if not open_teams:
+                return None
+            j = min(open_teams, key=lambda t: (sizes[t] >= min_size, totals[t]))
+            assignment[i] = j
+            sizes[j] += 1
+            totals[j] += scaled_scores[i]
+
+    if any(size < min_size or size > max_size for size in sizes):
+        return None
+    return assignment
+
+
+def canonical_assignment(assignment, scaled_scores, num_teams, tie_order=True):
+    """
+    Relabel teams so the assignment satisfies add_symmetry_breaking.
+
+    Teams are numbered in the order the strongest-first walk meets them, and
+    (with tie_order) runs of equal-score players get their team indices sorted.
+    """
+    order = strength_order(scaled_scores)
+    labels = {}
+    for i in order:
+        if assignment[i] not in labels:
+            labels[assignment[i]] = len(labels)
+    relabeled = [labels[j] for j in assignment]
+    if not tie_order:
+        return relabeled
+
+    start = 0
+    while start < len(order):
+        end = start
+        while end + 1 < len(order) and scaled_scores[order[end + 1]] == scaled_scores[order[start]]:
+            end += 1
+        group = order[start:end + 1]
+        for i, j in zip(group, sorted(relabeled[i] for i in group)):
+            relabeled[i] = j
+        start = end + 1
+    return relabeled
+
+
+def add_symmetry_breaking(model, assignments, scaled_scores, num_teams, tie_order=True):
+    """
+    Remove the num_teams! equivalent labelings of every lineup.
+
+    Players are visited strongest first. Team j may only receive a player once
+    team j-1 already holds an earlier one, so the strongest player always lands
+    in team 0 and each lineup has exactly one labeling. With tie_order, players
+    with equal scores count as interchangeable too, so their team indices must
+    be non-decreasing. That only holds while the objective is the range alone:
+    models that tell lineups apart by who plays with whom (the lineup pool,
+    season rotation) must leave it off.
+    """
+    n_players = len(scaled_scores)
+    order = strength_order(scaled_scores)
+
+    for pos, i in enumerate(order):
+        for j in range(1, num_teams):
+            earlier_in_prev_team = [assignments[(order[p], j - 1)] for p in range(pos)]
+            if earlier_in_prev_team:
+                model.Add(assignments[(i, j)] <= sum(earlier_in_prev_team))
+            else:
+                model.Add(assignments[(i, j)] == 0)
+    if not tie_order:
+        return
+
+    team_index = {
+        i: sum(j * assignments[(i, j)] for j in range(1, num_teams))
+        for i in range(n_players)
+    }
+    for a, b in zip(order, order[1:]):
+        if scaled_scores[a] == scaled_scores[b]:
+            model.Add(team_index[a] <= team_index[b])
+
+
+def teams_from_assignment(players, assignment, num_teams):
+    """Group players into teams from a team index per player"""
+    teams = [[] for _ in range(num_teams)]
+    for player, j in zip(players, assignment):
+        teams[j].append(player)
+    return teams
+
+
+def greedy_teams(players, num_teams, scores, locked_assignments=None):
+    """
+    Greedy lineup: locked players first, then strongest first onto the weakest team
+
+    Only teams that can still take a player within team_size_bounds are
+    candidates. scores is a (float) score per player. Returns the teams.
+    """
+    teams = [[] for _ in range(num_teams)]
+    totals = [0.0] * num_teams
+    index = {p['name']: i for i, p in enumerate(players)}
+    min_size, max_size = team_size_bounds(len(players), num_teams)
+    larger_teams = len(players) - min_size * num_teams  # teams that get max_size players
+
+    assigned = set()
+    for name, team in (locked_assignments or {}).items():
+        if name in index and 0 <= team < num_teams:
+            teams[team].append(players[index[name]])
+            totals[team] += scores[index[name]]
+            assigned.add(index[name])
+
+    for i in sorted(range(len(players)), key=lambda i: -scores[i]):
+        if i in assigned:
+            continue
+        n_larger = sum(len(team) > min_size for team in teams)
+        open_teams = [
+            t for t in range(num_teams)
+            if len(teams[t]) < min_size or (len(teams[t]) < max_size and n_larger < larger_teams)
+        ] or range(num_teams)  # locks overfilled the teams
+        weakest = min(open_teams, key=lambda t: totals[t])
+        teams[weakest].append(players[i])
+        totals[weakest] += scores[i]
+    return teams
+
+
+def within_gap(spread, lower_bound, settings):
+    """True if a (scaled) range is close enough to the lower bound to stop searching"""
+    gap = spread - lower_bound
+    return gap <= round(settings['gap_absolute'] * 100) or gap <= settings['gap_relative'] * spread
+
+
+def solution_callback(on_solution):
+    """
+    Wrap a plain function as a CP-SAT solution callback.
+
+    on_solution(callback) is called for every improving solution; the callback
+    gives access to Value, ObjectiveValue, BestObjectiveBound, WallTime and
+    StopSearch.
+    """
+    from ortools.sat.python import cp_model
+
+    class SolutionCallback(cp_model.CpSolverSolutionCallback):
+        def on_solution_callback(self):
+            on_solution(self)
+
+    return SolutionCallback()
+
+
+def build_balance_model(players, num_teams, settings, hint=None, hint_source='previous', scaled_scores=None,
+                        tie_order=True):
+    """
+    Build the CP-SAT model that minimizes the spread of team totals
+
+    tie_order is passed on to add_symmetry_breaking. Returns a dict with the
+    model, its variables and the (canonical) hint.
+    """
+    from ortools.sat.python import cp_model
+
+    n_players = len(players)
+
+    # Create the model
+    model = cp_model.CpModel()
+
+    # Decision variables: player i assigned to team j
+    assignments = {}
+    for i in range(n_players):
+        for j in range(num_teams):
+            assignments[(i, j)] = model.NewBoolVar(f'player_{i}_team_{j}')
+
+    # Constraint: Each player assigned to exactly one team
+    for i in range(n_players):
+        model.Add(sum(assignments[(i, j)] for j in range(num_teams)) == 1)
+
+    # Constraint: Team sizes should be as equal as possible
+    min_size, max_size = team_size_bounds(n_players, num_teams)
+
+    for j in range(num_teams):
+        team_size = sum(assignments[(i, j)] for i in range(n_players))
+        model.Add(team_size >= min_size)
+        model.Add(team_size <= max_size)
+
+    # Calculate player scores (combination of all stats)
+    if scaled_scores is None:
+        scaled_scores = scaled_player_scores(players)
+
+    # Calculate team totals
+    team_totals = []
+    for j in range(num_teams):
+        team_total = sum(assignments[(i, j)] * scaled_scores[i] for i in range(n_players))
+        team_totals.append(team_total)
+
+    # Minimize the difference between max and min team totals
+    max_total = model.NewIntVar(0, sum(scaled_scores), 'max_total')
+    min_total = model.NewIntVar(0, sum(scaled_scores), 'min_total')
+
+    for total in team_totals:
+        model.Add(max_total >= total)
+        model.Add(min_total <= total)
+
+    # Analytic bounds: the largest team is at least the average, the smallest at
+    # most the average, and no lineup beats range_lower_bound. With these the
+    # solver proves a lineup at the bound optimal as soon as it finds one.
+    lower_bound = range_lower_bound(scaled_scores, num_teams)
+    model.Add(max_total * num_teams >= sum(scaled_scores))
+    model.Add(min_total * num_teams <= sum(scaled_scores))
+    model.Add(max_total - min_total >= lower_bound)
+
+    if settings['symmetry_breaking']:
+        add_symmetry_breaking(model, assignments, scaled_scores, num_teams, tie_order)
+
+    # Warm start: the solver begins from a complete lineup and only has to improve it
+    if hint is None:
+        hint, hint_source = snake_draft(scaled_scores, num_teams), 'snake draft'
+    if settings['symmetry_breaking']:
+        hint = canonical_assignment(hint, scaled_scores, num_teams, tie_order)
+    if settings['warm_start']:
+        for i in range(n_players):
+            for j in range(num_teams):
+                model.AddHint(assignments[(i, j)], hint[i] == j)
+
+    # Objective: minimize the range (max - min)
+    model.Minimize(max_total - min_total)
+
+    return {
+        'model': model,
+        'assignments': assignments,
+        'spread': max_total - min_total,
+        'scaled_scores': scaled_scores,
+        'lower_bound': lower_bound,
+        'hint': hint,
+        'hint_source': hint_source if settings['warm_start'] else None
+    }
+
+
+def create_solver(settings, time_limit=None, seed_offset=0):
+    """CP-SAT solver configured for a parallel search"""
+    from ortools.sat.python import cp_model
+
+    solver = cp_model.CpSolver()
+    solver.parameters.num_workers = settings['num_workers']
+    solver.parameters.random_seed = settings['random_seed'] + seed_offset
+    if settings['deterministic']:
+        # Interleaved workers give the same answer for the same seed on every run
+        solver.parameters.interleave_search = True
+    solver.parameters.max_time_in_seconds = settings['time_limit'] if time_limit is None else time_limit
+    return solver
+
+
+def solve_stats(solver, status, settings, built):
+    """Status, timing and budget usage of a finished solve"""
+    return {
+        'status': solver.StatusName(status),
+        'engine': 'cp-sat',
+        'wall_time': solver.WallTime(),
+        'time_limit': settings['time_limit'],
+        'budget_used': min(1.0, solver.WallTime() / settings['time_limit']),
+        'num_workers': settings['num_workers'],
+        'random_seed': settings['random_seed'],
+        'warm_start': built['hint_source']
+    }
+
+
+def exact_partition_stats(exact, settings):
+    """Stats for a lineup from the exact partitioner (no CP-SAT run)"""
+    return {
+        'status': 'OPTIMAL' if exact['optimal'] else 'FEASIBLE',
+        'engine': 'exact partition',
+        'wall_time': exact['wall_time'],
+        'time_limit': settings['time_limit'],
+        'budget_used': min(1.0, exact['wall_time'] / settings['time_limit']),
+        'num_workers': 1,
+        'random_seed': settings['random_seed'],
+        'warm_start': None,
+        'range': exact['range'] / 100,
+        'lower_bound': exact['lower_bound'] / 100
+    }
+
+
+def try_exact_partition(players, num_teams, settings, hint=None, scaled_scores=None):
+    """
+    Run the exact partitioner ahead of CP-SAT
+
+    Returns (exact, hint, hint_source): exact is the partitioner result, and
+    hint the better starting lineup for CP-SAT (the caller's or the partition).
+    """
+    hint_source = 'previous' if hint is not None else None
+    if not settings['exact_partition']:
+        return None, hint, hint_source
+    if scaled_scores is None:
+        scaled_scores = scaled_player_scores(players)
+    exact = partition_balanced(scaled_scores, num_teams)
+    if hint is None or exact['range'] <= assignment_spread(scaled_scores, hint, num_teams):
+        hint, hint_source = exact['assignment'], 'exact partition'
+    return exact, hint, hint_source
+
+
+def generate_balanced_teams(players, num_teams, settings=None, hint=None, scaled_scores=None, live=None):
+    """
+    Generate balanced teams using OR-Tools optimization
+
+    hint is an optional team index per player (e.g. from assignment_from_teams)
+    used as the starting solution; without one a snake draft is used.
+    scaled_scores overrides the integer player scores (scaled_player_scores).
+    live is an optional live_solve.LiveSolve that receives every improving
+    lineup and can stop the search early.
+
+    The search ends as soon as a lineup is within settings['gap_absolute']
+    score points or settings['gap_relative'] of the analytic lower bound
+    (range_lower_bound); with the default zero gaps, once it reaches the bound.
+
+    Returns (teams, stats) where stats reports the solver status and how much
+    of the time budget the search used.
+    """
+    settings = {**DEFAULT_SOLVER_SETTINGS, **(settings or {})}
+    n_players = len(players)
+
+    if n_players < num_teams:
+        return None, None
+
+    # Certified optimum (or one within the gap) from the exact partitioner: no solver start-up at all
+    exact, hint, hint_source = try_exact_partition(players, num_teams, settings, hint, scaled_scores)
+    if exact and (exact['optimal'] or within_gap(exact['range'], exact['lower_bound'], settings)):
+        teams = teams_from_assignment(players, exact['assignment'], num_teams)
+        stats = exact_partition_stats(exact, settings)
+        if live is not None:
+            live.publish(teams, {**stats, 'bound': stats['range']})
+        return teams, stats
+
+    from ortools.sat.python import cp_model
+
+    built = build_balance_model(players, num_teams, settings, hint, hint_source, scaled_scores)
+    assignments = built['assignments']
+
+    # Solve with a parallel portfolio of search workers
+    solver = create_solver(settings)
+    # The gap limits work against the solver's own bound, the callback against the analytic one
+    solver.parameters.absolute_gap_limit = round(settings['gap_absolute'] * 100)
+    solver.parameters.relative_gap_limit = settings['gap_relative']
+    lower_bound = built['lower_bound']
+    # What an incumbent taken early (jobs.SolveJob.accept) reports besides its range
+    live_stats = {
+        'engine': 'cp-sat',
+        'time_limit': settings['time_limit'],
+        'num_workers': settings['num_workers'],
+        'random_seed': settings['random_seed'],
+        'warm_start': built['hint_source'],
+        'lower_bound': lower_bound / 100
+    }
+
+    def on_solution(cb):
+        # Stream every improving lineup; live.stop() interrupts the search
+        if live is not None:
+            teams = [[] for _ in range(num_teams)]
+            for i in range(n_players):
+                teams[next(j for j in range(num_teams) if cb.Value(assignments[(i, j)]))].append(players[i])
+            live.publish(teams, {
+                **live_stats,
+                'range': cb.ObjectiveValue() / 100,
+                'bound': max(cb.BestObjectiveBound(), lower_bound) / 100,
+                'wall_time': cb.WallTime(),
+                'budget_used': min(1.0, cb.WallTime() / settings['time_limit'])
+            })
+        if within_gap(round(cb.ObjectiveValue()), lower_bound, settings):
+            cb.StopSearch()
+
+    if live is not None:
+        live.attach(solver)
+    status = solver.Solve(built['model'], solution_callback(on_solution))
+    stats = solve_stats(solver, status, settings, built)
+    stats['lower_bound'] = lower_bound / 100
+    if live is not None and live.stop_requested and status == cp_model.FEASIBLE:
+        stats['stopped_early'] = True
+
+    if status == cp_model.OPTIMAL or status == cp_model.FEASIBLE:
+        stats['range'] = solver.ObjectiveValue() / 100
+        if round(solver.ObjectiveValue()) <= lower_bound:
+            stats['status'] = 'OPTIMAL'  # stopped at the bound, so nothing better exists
+        elif solver.BestObjectiveBound() < solver.ObjectiveValue():
+            stats['status'] = 'FEASIBLE'  # within the gap, but not proven (CP-SAT calls that OPTIMAL)
+        # Extract solution
+        teams = [[] for _ in range(num_teams)]
+        for i in range(n_players):
+            for j in range(num_teams):
+                if solver.Value(assignments[(i, j)]) == 1:
+                    teams[j].append(players[i])
+        return teams, stats
+    else:
+        # No solution within the time limit: fall back to the starting lineup
+        return teams_from_assignment(players, built['hint'], num_teams), stats
+
+
+def generate_lineup_pool(players, num_teams, settings=None, hint=None, live=None):
+    """
+    Collect several distinct near-optimal lineups from a single model
+
+    The main solve records every incumbent through a solution callback. The
+    best range found then caps the spread at best + pool_tolerance, and the
+    model is re-solved for new lineups. After each new lineup a no-good cut
+    forces at least pool_diversity players onto a different team.
+
+    live is an optional live_solve.LiveSolve; its stop() ends the search
+    and keeps the lineups found so far.
+
+    Returns (lineups, stats); lineups is a list of (teams, range) sorted
+    from most to least balanced.
+    """
+    from ortools.sat.python import cp_model
+
+    settings = {**DEFAULT_SOLVER_SETTINGS, **(settings or {})}
+    n_players = len(players)
+
+    if n_players < num_teams:
+        return [], None
+
+    exact, hint, hint_source = try_exact_partition(players, num_teams, settings, hint)
+    # Only team labels are symmetric here: swapping tied players gives a different
+    # lineup for the pool, and the no-good cuts already keep out repeats
+    built = build_balance_model(players, num_teams, settings, hint, hint_source, tie_order=False)
+    model = built['model']
+    assignments = built['assignments']
+
+    def read_assignment(source):
+        return tuple(
+            next(j for j in range(num_teams) if source.Value(assignments[(i, j)]))
+            for i in range(n_players)
+        )
+
+    incumbents = []
+    if exact and exact['optimal']:
+        # The partitioner already proved the best range, so only the pool phase runs
+        status = cp_model.OPTIMAL
+        stats = exact_partition_stats(exact, settings)
+        best = exact['range']
+        incumbents.append((tuple(built['hint']), best))
+    else:
+        collector = solution_callback(
+            lambda cb: incumbents.append((read_assignment(cb), int(cb.ObjectiveValue())))
+        )
+
+        solver = create_solver(settings)
+        if live is not None:
+            live.attach(solver)
+        status = solver.Solve(model, collector)
+        stats = solve_stats(solver, status, settings, built)
+
+        if status not in (cp_model.OPTIMAL, cp_model.FEASIBLE):
+            teams = teams_from_assignment(players, built['hint'], num_teams)
+            return [(teams, None)], stats
+        best = int(solver.ObjectiveValue())
+
+    threshold = best + int(settings['pool_tolerance'] * 100)
+    stats['range'] = best / 100
+
+    found = {}
+    for assignment, spread in incumbents:
+        if spread <= threshold:
+            found[assignment] = min(spread, found.get(assignment, spread))
+
+    # Pool phase: the most balanced lineup within tolerance that differs from every lineup found so far
+    model.ClearHints()
+    model.Add(built['spread'] <= threshold)
+    if status == cp_model.OPTIMAL:
+        # Lets each re-solve stop as soon as it matches the proven best range
+        model.Add(built['spread'] >= best)
+    min_changes = min(settings['pool_diversity'], n_players)
+
+    def exclude(assignment):
+        model.Add(
+            sum(assignments[(i, j)] for i, j in enumerate(assignment)) <= n_players - min_changes
+        )
+
+    for assignment in found:
+        exclude(assignment)
+
+    pool_time = settings['pool_time_limit']
+    attempt = 0
+    while len(found) < settings['pool_size'] and pool_time > 0.01:
+        if live is not None and live.stop_requested:
+            break
+        attempt += 1
+        time_share = pool_time / (settings['pool_size'] - len(found))
+        pool_solver = create_solver(settings, time_limit=time_share, seed_offset=attempt)
+        if live is not None:
+            live.attach(pool_solver)
+        pool_status = pool_solver.Solve(model)
+        pool_time -= pool_solver.WallTime()
+        if pool_status == cp_model.INFEASIBLE:
+            break  # no more distinct lineups within tolerance
+        if pool_status not in (cp_model.OPTIMAL, cp_model.FEASIBLE):
+            continue
+        assignment = read_assignment(pool_solver)
+        found[assignment] = int(pool_solver.Value(built['spread']))
+        exclude(assignment)
+
+    stats['pool_size'] = len(found)
+    stats['pool_time'] = settings['pool_time_limit'] - max(0.0, pool_time)
+
+    lineups = sorted(found.items(), key=lambda item: item[1])
+    return [
+        (teams_from_assignment(players, assignment, num_teams), spread / 100)
+        for assignment, spread in lineups
+    ], stats
+
+
+# Partnerships and conflicts (CBC model used by the enhanced app)
+
+PARTNERSHIP_WEIGHT = 10  # score points a split partnership costs
+CONFLICT_WEIGHT = 20     # score points a conflict pair sharing a team costs (when it cannot be separated)
+
+
+def relation_pairs(relations, index):
+    """Sorted index pairs (i < j) of related players that are both in the index"""
+    return sorted({
+        (min(index[name], index[other]), max(index[name], index[other]))
+        for name, others in relations.items() if name in index
+        for other in others if other in index and other != name
+    })
+
+
+def conflict_cliques(pairs):
+    """
+    Cover the conflict edges with cliques
+
+    Each clique becomes one "at most one of these per team" row, which is
+    tighter for CBC than a row per conflicting pair. Cliques are grown
+    greedily from each uncovered edge.
+    """
+    neighbours = {}
+    for i, j in pairs:
+        neighbours.setdefault(i, set()).add(j)
+        neighbours.setdefault(j, set()).add(i)
+
+    covered = set()
+    cliques = []
+    for i, j in pairs:
+        if (i, j) in covered:
+            continue
+        clique = [i, j]
+        candidates = neighbours[i] & neighbours[j]
+        for k in sorted(candidates, key=lambda k: -len(neighbours[k])):
+            if all(k in neighbours[member] for member in clique):
+                clique.append(k)
+        clique.sort()
+        covered.update((a, b) for pos, a in enumerate(clique) for b in clique[pos + 1:])
+        cliques.append(clique)
+    return cliques
+
+
+def build_relations_model(players, num_teams, partnerships, conflicts, locked_assignments, scores,
+                          hard_conflicts=True, hint=None):
+    """
+    Build the CBC model that balances team scores around partnerships and conflicts
+
+    Names are resolved once through a name -> index map. Each partnership
+    gets a same-team indicator that may only be 1 when both players share a
+    team, and every split partnership costs PARTNERSHIP_WEIGHT. With
+    hard_conflicts each conflict clique may place at most one player per
+    team; otherwise a together indicator per conflict pair costs
+    CONFLICT_WEIGHT.
+
+    Returns a dict with the problem, its variables and the model sizes.
+    """
+    from pulp import LpBinary, LpMinimize, LpProblem, LpVariable, lpSum
+
+    n_players = len(players)
+    teams = range(num_teams)
+    index = {p['name']: i for i, p in enumerate(players)}
+
+    prob = LpProblem("Team_Balancing", LpMinimize)
+
+    # Decision variables
+    assignments = {
+        (i, t): LpVariable(f"player_{i}_team_{t}", cat=LpBinary)
+        for i in range(n_players) for t in teams
+    }
+
+    if hint is not None:
+        for i, team in enumerate(hint):
+            for t in teams:
+                assignments[(i, t)].setInitialValue(1 if t == team else 0)
+
+    # Each player assigned to exactly one team
+    for i in range(n_players):
+        prob += lpSum(assignments[(i, t)] for t in teams) == 1
+
+    # Lock players to specific teams
+    for name, team in locked_assignments.items():
+        if name in index and 0 <= team < num_teams:
+            prob += assignments[(index[name], team)] == 1
+
+    # Team size constraints
+    min_size, max_size = team_size_bounds(n_players, num_teams)
+    for t in teams:
+        size = lpSum(assignments[(i, t)] for i in range(n_players))
+        prob += size >= min_size
+        prob += size <= max_size
+
+    # Team scores and their range
+    max_score = LpVariable("max_score")
+    min_score = LpVariable("min_score")
+    for t in teams:
+        team_score = lpSum(scores[i] * assignments[(i, t)] for i in range(n_players))
+        prob += team_score <= max_score
+        prob += team_score >= min_score
+
+    # Analytic bounds, as in build_balance_model: the largest team is at least the
+    # average and the smallest at most the average. When the scores are whole
+    # hundredths (the scaling every other model uses), both round to a multiple
+    # of their gcd, so CBC proves a lineup at range_lower_bound optimal at once.
+    scaled_scores = [round(score * 100) for score in scores]
+    if all(abs(score * 100 - scaled) < 1e-6 for score, scaled in zip(scores, scaled_scores)):
+        largest_at_least, smallest_at_most = total_bounds(scaled_scores, num_teams)
+        lower_bound = (largest_at_least - smallest_at_most) / 100
+        prob += max_score >= largest_at_least / 100
+        prob += min_score <= smallest_at_most / 100
+        prob += max_score - min_score >= lower_bound
+    else:
+        lower_bound = 0.0
+        prob += max_score * num_teams >= sum(scores)
+        prob += min_score * num_teams <= sum(scores)
+
+    # Partnerships: together may only be 1 if no team holds one partner without the other
+    penalties = []
+    partner_pairs = relation_pairs(partnerships, index)
+    for i, j in partner_pairs:
+        together = LpVariable(f"together_{i}_{j}", cat=LpBinary)
+        for t in teams:
+            prob += together <= 1 - assignments[(i, t)] + assignments[(j, t)]
+        penalties.append(PARTNERSHIP_WEIGHT * (1 - together))
+
+    # Conflicts: hard clique separation, or a penalized together indicator per pair
+    conflict_pairs = relation_pairs(conflicts, index)
+    cliques = conflict_cliques(conflict_pairs) if hard_conflicts else []
+    for clique in cliques:
+        for t in teams:
+            prob += lpSum(assignments[(i, t)] for i in clique) <= 1
+    if not hard_conflicts:
+        for i, j in conflict_pairs:
+            clash = LpVariable(f"clash_{i}_{j}", cat=LpBinary)
+            for t in teams:
+                prob += clash >= assignments[(i, t)] + assignments[(j, t)] - 1
+            penalties.append(CONFLICT_WEIGHT * clash)
+
+    # One objective: score range plus relation penalties
+    prob += max_score - min_score + lpSum(penalties)
+
+    return {
+        'prob': prob,
+        'assignments': assignments,
+        'num_teams': num_teams,
+        'hard_conflicts': hard_conflicts,
+        'lower_bound': lower_bound,
+        'partnerships': len(partner_pairs),
+        'conflicts': len(conflict_pairs),
+        'conflict_cliques': len(cliques),
+        # More players in one conflict clique than teams can never be separated
+        'separable': all(len(clique) <= num_teams for clique in cliques)
+    }
+
+
+def solve_relations_model(built, time_limit=None):
+    """
+    Solve a model from build_relations_model with CBC
+
+    Returns (assignment, status); assignment is a team index per player, or
+    None when CBC found no lineup (status is then PuLP's). With a lineup,
+    status is 'Optimal' if CBC proved it optimal and 'Feasible' if it
+    stopped before that (PuLP calls both 'Optimal'; sol_status tells them apart).
+    """
+    from pulp import PULP_CBC_CMD, LpSolutionOptimal, LpStatus, value
+
+    prob = built['prob']
+    assignments = built['assignments']
+    warm_start = any(var.varValue is not None for var in assignments.values())
+    status = prob.solve(PULP_CBC_CMD(msg=0, warmStart=warm_start, timeLimit=time_limit))
+    if LpStatus[status] not in ('Optimal', 'Not Solved') or value(prob.objective) is None:
+        return None, LpStatus[status]
+
+    n_players = len(assignments) // built['num_teams']
+    assignment = [
+        max(range(built['num_teams']), key=lambda t: value(assignments[(i, t)]) or 0)
+        for i in range(n_players)
+    ]
+    return assignment, 'Optimal' if prob.sol_status == LpSolutionOptimal else 'Feasible'
+
+
+def balance_with_relations(players, num_teams, partnerships, conflicts, locked_assignments, scores,
+                           hint=None, time_limit=None):
+    """
+    Balance teams with partnerships, conflicts and locks
+
+    Conflicts are hard constraints first. When they cannot all be satisfied
+    (too many mutually conflicting players, or locks that force a conflict)
+    the model is rebuilt with conflicts as penalties instead.
+
+    Returns (teams, status) with the status of solve_relations_model;
+    teams is None when no lineup was found.
+    """
+    built = build_relations_model(players, num_teams, partnerships, conflicts, locked_assignments, scores,
+                                  hint=hint)
+    assignment, status = None, 'Not Solved'
+    if built['separable']:
+        assignment, status = solve_relations_model(built, time_limit)
+    if assignment is None and built['conflicts']:
+        built = build_relations_model(players, num_teams, partnerships, conflicts, locked_assignments, scores,
+                                      hard_conflicts=False, hint=hint)
+        assignment, status = solve_relations_model(built, time_limit)
+    if assignment is None:
+        return None, status
+    return teams_from_assignment(players, assignment, num_teams), status
@@ -0,0 +1,53 @@
+"""
+Benchmark: every registered solver backend head-to-head.
+
+Usage:
+    python benchmarks/bench_backends.py [--sizes 12,30,60,200] [--teams 2,4,6] [--time-limit 5] [--seeds 2]
+
+Each roster is balanced by every available backend that supports it, plus
+'auto' to show which one select_backend picks. Columns are the wall time
+and the range (max - min team total) reached.
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from backends import BACKENDS, backend_available, balance, select_backend
+from bench_symmetry import random_roster
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--sizes', default='12,30,60,200')
+    parser.add_argument('--teams', default='2,4,6')
+    parser.add_argument('--time-limit', type=float, default=5.0)
+    parser.add_argument('--seeds', type=int, default=2)
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1)
+    args = parser.parse_args()
+
+    names = [name for name in BACKENDS if backend_available(name)]
+    print(f"{'players':>7} {'teams':>5} {'seed':>4} | {'auto picks':>15} | "
+          + " | ".join(f"{name:>17}" for name in names))
+    for n_players in map(int, args.sizes.split(',')):
+        for num_teams in map(int, args.teams.split(',')):
+            for seed in range(args.seeds):
+                players = random_roster(n_players, seed)
+                settings = {
+                    'num_workers': args.workers,
+                    'random_seed': seed,
+                    'time_limit': args.time_limit
+                }
+                row = []
+                for name in names:
+                    start = time.perf_counter()
+                    _, stats = balance(players, num_teams, settings={**settings, 'backend': name})
+                    row.append(f"{time.perf_counter() - start:7.3f}s {stats['range']:7.2f}")
+                picked = select_backend(players, num_teams, settings=settings)
+                print(f"{n_players:>7} {num_teams:>5} {seed:>4} | {picked:>15} | " + " | ".join(row))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,113 @@
+"""
+Benchmark: build and solve time of the partnership/conflict CBC model.
+
+Usage:
+    python benchmarks/bench_relations.py [--players 200] [--edges 300] [--teams 10] [--time-limit 60]
+
+Half of the edges are partnerships and half are conflicts, drawn at random
+between distinct players. The legacy column times the old constraint layer
+(a linear name scan per relation and constant penalty terms) for comparison;
+it is only built, never solved.
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from balancing import build_relations_model, solve_relations_model, teams_from_assignment
+from bench_symmetry import random_roster
+from features import CORE_SCORE_WEIGHTS, feature_matrix, player_scores
+
+
+def random_relations(players, n_edges, rng):
+    names = [p['name'] for p in players]
+    edges = set()
+    while len(edges) < n_edges:
+        a, b = rng.sample(names, 2)
+        edges.add((min(a, b), max(a, b)))
+    edges = sorted(edges)
+    rng.shuffle(edges)
+    partnerships, conflicts = {}, {}
+    for k, (a, b) in enumerate(edges):
+        relations = partnerships if k % 2 == 0 else conflicts
+        relations.setdefault(a, []).append(b)
+    return partnerships, conflicts
+
+
+def legacy_build(players, num_teams, partnerships, conflicts, scores):
+    """The old pairwise layer: name scans per relation, penalties summed over teams"""
+    from pulp import LpBinary, LpMinimize, LpProblem, LpVariable, lpSum
+
+    prob = LpProblem("Team_Balancing", LpMinimize)
+    assignments = {
+        (i, t): LpVariable(f"player_{i}_team_{t}", cat=LpBinary)
+        for i in range(len(players)) for t in range(num_teams)
+    }
+    for t in range(num_teams):
+        prob += lpSum(scores[i] * assignments[(i, t)] for i in range(len(players))) >= 0
+    penalty = 0
+    for relations, weight in ((partnerships, 10), (conflicts, 20)):
+        for player1, others in relations.items():
+            p1_idx = next((i for i, p in enumerate(players) if p['name'] == player1), None)
+            for player2 in others:
+                p2_idx = next((i for i, p in enumerate(players) if p['name'] == player2), None)
+                for t in range(num_teams):
+                    penalty += weight * (assignments[(p1_idx, t)] + assignments[(p2_idx, t)] - 1)
+    prob += penalty
+    return prob
+
+
+def count_violations(teams, partnerships, conflicts):
+    team_of = {p['name']: t for t, team in enumerate(teams) for p in team}
+    split = sum(team_of[a] != team_of[b] for a, others in partnerships.items() for b in others)
+    clashes = sum(team_of[a] == team_of[b] for a, others in conflicts.items() for b in others)
+    return split, clashes
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--players', type=int, default=200)
+    parser.add_argument('--edges', type=int, default=300)
+    parser.add_argument('--teams', type=int, default=10)
+    parser.add_argument('--time-limit', type=float, default=60.0)
+    parser.add_argument('--seeds', type=int, default=3)
+    args = parser.parse_args()
+
+    print(f"{'seed':>4} | {'legacy build':>12} | {'build':>7} {'cliques':>7} | {'status':>10} {'solve':>8} | "
+          f"{'range':>6} {'split':>5} {'clashes':>7}")
+    for seed in range(args.seeds):
+        rng = random.Random(seed)
+        players = random_roster(args.players, seed)
+        partnerships, conflicts = random_relations(players, args.edges, rng)
+        scores = player_scores(feature_matrix(players), CORE_SCORE_WEIGHTS).tolist()
+
+        start = time.perf_counter()
+        legacy_build(players, args.teams, partnerships, conflicts, scores)
+        legacy_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        built = build_relations_model(players, args.teams, partnerships, conflicts, {}, scores)
+        build_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        assignment, status = solve_relations_model(built, args.time_limit)
+        solve_time = time.perf_counter() - start
+
+        if assignment is None:
+            print(f"{seed:>4} | {legacy_time:11.3f}s | {build_time:6.3f}s {built['conflict_cliques']:>7} | "
+                  f"{status:>10} {solve_time:7.2f}s |")
+            continue
+        teams = teams_from_assignment(players, assignment, args.teams)
+        totals = [sum(scores[players.index(p)] for p in team) for team in teams]
+        split, clashes = count_violations(teams, partnerships, conflicts)
+        print(
+            f"{seed:>4} | {legacy_time:11.3f}s | {build_time:6.3f}s {built['conflict_cliques']:>7} | "
+            f"{status:>10} {solve_time:7.2f}s | {max(totals) - min(totals):6.2f} {split:>5} {clashes:>7}"
+        )
+
+
+if __name__ == '__main__':
+    main()
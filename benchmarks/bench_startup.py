@@ -0,0 +1,84 @@
+"""
+Benchmark: cold-start time to first render of every page of both apps.
+
+Usage:
+    python benchmarks/bench_startup.py [--runs 3] [--eager]
+
+Each measurement runs in a fresh interpreter (a cold server process), so
+nothing is cached in sys.modules. The page is rendered once with
+Streamlit's AppTest and timed from the start of the script run to its end.
+Background pre-warming is off during the runs so it does not compete with
+the render. --eager imports the heavy modules inside the timed region
+first, which is what every page paid when the apps imported them at the
+top. Requires streamlit.
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+PAGES = {
+    'team_balance_apple.py': ['home', 'players', 'game', 'history'],
+    'team_balance_enhanced.py': ['home', 'players', 'partnerships', 'game', 'history']
+}
+HEAVY_MODULES = ['numpy', 'pandas', 'ortools', 'pulp', 'supabase']
+
+# Runs in the child interpreter: render one page, report its time and the heavy modules it loaded
+CHILD = """
+import json, sys, time
+from streamlit.testing.v1 import AppTest
+
+app, page, eager, heavy = sys.argv[1], sys.argv[2], sys.argv[3] == '1', sys.argv[4].split(',')
+at = AppTest.from_file(app, default_timeout=120)
+at.session_state['page'] = page
+start = time.perf_counter()
+if eager:
+    import backends, pandas, ortools.sat.python.cp_model
+    try:
+        import pulp
+    except ImportError:
+        pass
+at.run()
+elapsed = time.perf_counter() - start
+print(json.dumps({
+    'seconds': elapsed,
+    'errors': [str(e.value) for e in at.exception],
+    'loaded': [name for name in heavy if name in sys.modules]
+}))
+"""
+
+
+def render_time(app, page, eager):
+    env = {**os.environ, 'PREWARM_MODULES': ''}
+    output = subprocess.run(
+        [sys.executable, '-c', CHILD, app, page, '1' if eager else '0', ','.join(HEAVY_MODULES)],
+        cwd=ROOT, env=env, capture_output=True, text=True, check=True
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--runs', type=int, default=3)
+    parser.add_argument('--eager', action='store_true', help="import the heavy modules before rendering")
+    args = parser.parse_args()
+
+    print(f"{'app':<26} {'page':<13} | {'first render':>12} | heavy modules loaded")
+    for app, pages in PAGES.items():
+        for page in pages:
+            results = [render_time(app, page, args.eager) for _ in range(args.runs)]
+            seconds = statistics.median(result['seconds'] for result in results)
+            errors = results[-1]['errors']
+            print(
+                f"{app:<26} {page:<13} | {seconds * 1000:10.0f}ms | "
+                f"{', '.join(results[-1]['loaded']) or '-'}"
+                + (f"  (errors: {'; '.join(errors)})" if errors else "")
+            )
+
+
+if __name__ == '__main__':
+    main()
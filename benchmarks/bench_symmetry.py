@@ -0,0 +1,66 @@
+"""
+Benchmark: time to prove optimality with and without symmetry breaking.
+
+Usage:
+    python benchmarks/bench_symmetry.py [--players-per-team 5] [--time-limit 30] [--seeds 3]
+
+Random rosters are built with the same stat ranges as the app (1-10 per stat),
+so each run is reproducible from its seed.
+"""
+import argparse
+import os
+import random
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from balancing import generate_balanced_teams
+
+
+def random_roster(n_players, seed):
+    rng = random.Random(seed)
+    return [
+        {
+            'name': f'Player {i + 1}',
+            'running_ability': rng.randint(1, 10),
+            'goal_scoring': rng.randint(1, 10),
+            'overall_skill': rng.randint(1, 10)
+        }
+        for i in range(n_players)
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--players-per-team', type=int, default=5)
+    parser.add_argument('--time-limit', type=float, default=30.0)
+    parser.add_argument('--seeds', type=int, default=3)
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1)
+    args = parser.parse_args()
+
+    print(f"{'teams':>5} {'seed':>4} | {'no symmetry breaking':>26} | {'symmetry breaking':>26} | speedup")
+    for num_teams in (4, 6, 8, 10):
+        for seed in range(args.seeds):
+            players = random_roster(num_teams * args.players_per_team, seed)
+            row = []
+            for symmetry_breaking in (False, True):
+                _, stats = generate_balanced_teams(players, num_teams, {
+                    'num_workers': args.workers,
+                    'random_seed': seed,
+                    'time_limit': args.time_limit,
+                    'symmetry_breaking': symmetry_breaking,
+                    'exact_partition': False  # time CP-SAT itself
+                })
+                row.append(stats)
+            base, sym = row
+            speedup = base['wall_time'] / max(sym['wall_time'], 1e-6)
+            print(
+                f"{num_teams:>5} {seed:>4} | "
+                f"{base['status']:>8} {base['wall_time']:7.2f}s range {base['range']:5.2f} | "
+                f"{sym['status']:>8} {sym['wall_time']:7.2f}s range {sym['range']:5.2f} | "
+                f"{speedup:6.1f}x"
+            )
+
+
+if __name__ == '__main__':
+    main()
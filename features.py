@@ -0,0 +1,91 @@
+"""
+Vectorized player features and team metrics.
+
+A roster is converted once into a float matrix with one row per player:
+the five stats followed by a one-hot position block. Player scores are a
+matrix-vector product, and every per-team sum, average and position count
+comes out of a single (num_teams x n_players) @ (n_players x features)
+product driven by a team-assignment vector.
+"""
+import numpy as np
+
+POSITIONS = ["Forward", "Midfielder", "Defender", "Goalkeeper"]
+
+# Stat columns and the defaults the apps use for missing values
+STAT_COLUMNS = ['running_ability', 'goal_scoring', 'overall_skill', 'age', 'height']
+STAT_DEFAULTS = {'running_ability': 5, 'goal_scoring': 5, 'overall_skill': 5, 'age': 25, 'height': 170}
+
+RUNNING, GOALS, SKILL, AGE, HEIGHT = range(len(STAT_COLUMNS))
+POSITION_SLICE = slice(len(STAT_COLUMNS), len(STAT_COLUMNS) + len(POSITIONS))
+N_FEATURES = len(STAT_COLUMNS) + len(POSITIONS)
+
+# Score weights per column (position columns never count towards the score)
+# Full score used by the partnerships app: age and height are normalized to the 1-10 scale
+SCORE_WEIGHTS = np.array([1, 1, 1, 1 / 5, 1 / 34, 0, 0, 0, 0], dtype=float)
+# Running + goals + skill, as used by the CP-SAT balancer
+CORE_SCORE_WEIGHTS = np.array([1, 1, 1, 0, 0, 0, 0, 0, 0], dtype=float)
+
+
+def feature_matrix(players):
+    """Stats and one-hot position of every player as an (n_players x N_FEATURES) array"""
+    matrix = np.zeros((len(players), N_FEATURES))
+    for column, stat in enumerate(STAT_COLUMNS):
+        default = STAT_DEFAULTS[stat]
+        matrix[:, column] = [player.get(stat, default) for player in players]
+    position_index = {pos: len(STAT_COLUMNS) + k for k, pos in enumerate(POSITIONS)}
+    for row, player in enumerate(players):
+        column = position_index.get(player.get('position', 'Midfielder'))
+        if column is not None:
+            matrix[row, column] = 1
+    return matrix
+
+
+def player_scores(matrix, weights=SCORE_WEIGHTS):
+    """Score of every player"""
+    return matrix @ weights
+
+
+def flatten_teams(teams):
+    """Players of all teams in one list plus the team index of each player"""
+    players = [player for team in teams for player in team]
+    assignment = np.repeat(np.arange(len(teams)), [len(team) for team in teams])
+    return players, assignment
+
+
+def team_sums(matrix, assignment, num_teams):
+    """Per-team column sums and team sizes for a team index per player"""
+    membership = np.zeros((num_teams, len(assignment)))
+    membership[assignment, np.arange(len(assignment))] = 1
+    return membership @ matrix, membership.sum(axis=1)
+
+
+def team_metrics(matrix, assignment, num_teams, weights=SCORE_WEIGHTS):
+    """
+    Metrics of every team in one pass
+
+    Returns a list of dicts with the same keys as calculate_team_metrics:
+    averages of each stat, total score and position distribution.
+    """
+    sums, sizes = team_sums(matrix, assignment, num_teams)
+    averages = sums / np.maximum(sizes, 1)[:, None]
+    totals = sums @ weights
+    positions = sums[:, POSITION_SLICE].astype(int)
+
+    return [
+        {
+            'avg_running': float(averages[t, RUNNING]),
+            'avg_goals': float(averages[t, GOALS]),
+            'avg_age': float(averages[t, AGE]),
+            'avg_height': float(averages[t, HEIGHT]),
+            'avg_skill': float(averages[t, SKILL]),
+            'total_score': float(totals[t]),
+            'position_dist': dict(zip(POSITIONS, positions[t].tolist()))
+        }
+        for t in range(num_teams)
+    ]
+
+
+def teams_metrics(teams, weights=SCORE_WEIGHTS):
+    """team_metrics for a list of teams (lists of player dicts)"""
+    players, assignment = flatten_teams(teams)
+    return team_metrics(feature_matrix(players), assignment, len(teams), weights)
@@ -0,0 +1,99 @@
+"""
+Streamlit side of the background solve jobs, shared by both apps.
+
+One JobManager and one pre-warm thread per server process. A session
+keeps the id of the job it waits for in st.session_state.solve_job and in
+the URL (?job=), so a browser that reconnects re-attaches to it; the
+apps set st.session_state.session_key, which identifies the session in
+the fair queue and on shared jobs.
+"""
+import streamlit as st
+
+from jobs import QUEUED, JobManager
+from prewarm import prewarm
+
+# Background solve jobs shared by every session of this server process
+@st.cache_resource
+def get_job_manager():
+    """Thread pool that runs solves off the script thread"""
+    return JobManager()
+
+# Heavy modules (NumPy, pandas, OR-Tools, PuLP) load in the functions that use them,
+# and once per server process in the background after the first page is out
+@st.cache_resource
+def start_prewarm():
+    """Module name -> import time, filled in by the background thread"""
+    return prewarm()
+
+# Fragments rerun on their own, so polling a job does not block the rest of the page
+fragment = getattr(st, 'fragment', None) or st.experimental_fragment
+
+def current_job():
+    """Solve job this session is waiting for (re-attached from the URL after a reconnect)"""
+    job_id = st.session_state.solve_job or st.query_params.get('job')
+    job = get_job_manager().get(job_id) if job_id else None
+    if job is None and job_id:
+        forget_job()
+    return job
+
+def cancel_job(job):
+    """Detach this session from its job; the job is cancelled unless another session still waits for it"""
+    job.cancel(st.session_state.session_key)
+    forget_job()
+    st.rerun()
+
+def forget_job():
+    """Detach the session from its solve job"""
+    st.session_state.solve_job = None
+    if 'job' in st.query_params:
+        del st.query_params['job']
+
+@fragment(run_every=0.5)
+def render_job_progress(job_id, accept_label="✋ Use Best So Far", show_lineup=False):
+    """
+    Status and best range so far of a running job, with accept and cancel buttons
+
+    show_lineup also lists the players of each team in the best lineup so far.
+    """
+    job = get_job_manager().get(job_id)
+    if job is None or job.done:
+        st.rerun()  # the full page collects the result
+
+    if job.status == QUEUED:
+        load = get_job_manager().metrics()
+        st.info(
+            f"⏳ {job.label}: queued, position {job.queue_position()} • waited {job.wait_time():.1f}s • "
+            f"{load['running']}/{load['max_concurrent']} solves running, typical wait {load['mean_wait']:.1f}s"
+        )
+        if st.button("✖️ Cancel", use_container_width=True):
+            cancel_job(job)
+        return
+
+    latest = job.latest()
+    if latest is None:
+        st.info(f"⏳ Balancing {job.label}: {job.status}, searching for a first lineup... {job.elapsed():.1f}s")
+    else:
+        teams, info = latest
+        bound = f", bound {info['bound']:g}" if info['bound'] is not None else ""
+        st.info(
+            f"⏳ Balancing {job.label}: best range so far {info['range']:g}{bound} "
+            f"(found at {info['wall_time']:.2f}s), still searching... {job.elapsed():.1f}s"
+        )
+        if show_lineup:
+            for col, (idx, team) in zip(st.columns(len(teams)), enumerate(teams)):
+                col.markdown(f"**Team {idx + 1}**  \n" + "  \n".join(p['name'] for p in team))
+
+    col1, col2 = st.columns(2)
+    if col1.button(accept_label, use_container_width=True, disabled=latest is None or job.stop_requested):
+        accepted = job.accept(st.session_state.session_key)
+        if accepted is not None and accepted is not job:
+            # Other sessions still wait for this job: it keeps searching, this session takes a copy
+            st.session_state.solve_job = accepted.id
+            st.query_params['job'] = accepted.id
+            st.rerun()
+    if col2.button(
+        "✖️ Cancel", use_container_width=True,
+        help="CP-SAT, the league LNS and swap search stop at once; a CBC or exact-partition solve "
+             "runs out its time budget in the background"
+    ):
+        cancel_job(job)
@@ -0,0 +1,396 @@
+"""
+Background solve jobs with server-wide admission control.
+
+Solves run off the Streamlit script thread, so the page stays responsive
+and a rerun or a browser reconnect does not throw the work away. Every job
+has an id, a status, live progress (it is a live_solve.LiveSolve) and can
+be accepted early or cancelled. Requests with the same fingerprint share
+one job (single flight), and a repeat within DEBOUNCE_SECONDS of the
+result gets that result back; a session accepting or cancelling a shared
+job leaves the search running for the others. Finished jobs are kept for a while so a
+page can re-attach by id and collect the result.
+
+All sessions share one JobManager. At most max_concurrent solves run at a
+time; the rest wait in per-session queues ('fair': the session with the
+fewest running solves goes next, ties round-robin, so one busy organiser
+cannot starve the others) or in one queue in submission order ('fifo').
+
+Every job runs in a thread of its own. CP-SAT's search and the CBC binary
+run outside the GIL there, so each running solve gets real cores (only
+building their models is Python); solver_workers() splits the machine's
+cores between the concurrent slots so solves do not oversubscribe them.
+The pure-Python engines (exact partitioner, league LNS, swap search) would
+hold the GIL for their whole run and stall every script thread of the
+server, so a job runs them in a process pool of max_concurrent workers
+instead (SolveJob.run_python), where stop() still reaches them.
+Queue depth, wait and run times are kept for metrics().
+"""
+import copy
+import itertools
+import multiprocessing
+import os
+import sys
+import threading
+import time
+import uuid
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, wait
+
+from live_solve import LiveSolve
+
+QUEUED, RUNNING, DONE, FAILED, CANCELLED = 'queued', 'running', 'done', 'failed', 'cancelled'
+
+# Server-wide limits (environment variables, as for the solver settings)
+try:
+    DEFAULT_MAX_CONCURRENT = max(1, int(os.getenv('SOLVE_MAX_CONCURRENT', '')))
+except ValueError:
+    DEFAULT_MAX_CONCURRENT = min(4, os.cpu_count() or 1)
+DEFAULT_QUEUE_POLICY = os.getenv('SOLVE_QUEUE_POLICY', 'fair')  # 'fair' or 'fifo'
+# Finished jobs stay available for re-attaching this long (and at most this many)
+JOB_RETENTION = 3600.0
+MAX_FINISHED_JOBS = 200
+# Wait and run times kept for the metrics
+METRICS_WINDOW = 200
+# A request identical to one that finished this recently gets that job back (debounces repeat clicks)
+DEBOUNCE_SECONDS = 3.0
+# How often a job waiting on its process pool task passes on a stop()
+PROCESS_POLL_SECONDS = 0.05
+
+ENGINES_DIR = os.path.dirname(os.path.abspath(__file__))
+# Stop flags of the process pool's slots, as seen from inside a pool worker
+_worker_stop_flags = None
+
+
+def _init_worker(stop_flags):
+    global _worker_stop_flags
+    _worker_stop_flags = stop_flags
+
+
+def _run_in_worker(slot, fn, args, kwargs, stoppable):
+    if stoppable:
+        kwargs['stop'] = lambda: bool(_worker_stop_flags[slot])
+    return fn(*args, **kwargs)
+
+
+class SolveJob(LiveSolve):
+    """One submitted solve: LiveSolve progress plus id, label, sessions and status"""
+
+    def __init__(self, label='', session=None, key=None):
+        super().__init__()
+        self.id = uuid.uuid4().hex[:12]
+        self.label = label
+        self.session = session
+        self.key = key
+        self.sessions = {session}  # every session attached to this job
+        self.status = QUEUED
+        self.submitted_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+        self.manager = None
+        self.solve = None
+
+    def cancel(self, session=None):
+        """
+        Drop the job: a queued job never starts and a running one's result is discarded
+
+        A running CP-SAT, league LNS or swap search solve stops at its next
+        step. CBC and the exact partitioner cannot be interrupted: they run
+        to their time limit in the background and keep their slot until then.
+        With a session, only that session detaches; the job is cancelled
+        once no attached session is left.
+        """
+        if self.done:
+            return
+        if session is not None:
+            self.sessions.discard(session)
+            if self.sessions:
+                return
+        if self.manager is not None and self.manager._dequeue(self):
+            return
+        self.status = CANCELLED
+        self.stop()
+
+    def accept(self, session=None):
+        """
+        Take the best lineup so far; returns the job to collect it from, or None if there is none yet
+
+        When no other session is attached, the search stops and the lineup
+        becomes this job's result. Otherwise the search keeps running for
+        the others: the session detaches and gets a finished job holding a
+        copy of the lineup.
+        """
+        latest = self.latest()
+        if latest is None:
+            return None
+        if session is None or self.done or not self.sessions - {session}:
+            self.stop()
+            return self
+        self.sessions.discard(session)
+        teams, info = copy.deepcopy(latest)
+        stats = {'status': 'FEASIBLE', **info, 'stopped_early': True}
+        del stats['bound']
+        accepted = SolveJob(self.label, session)
+        accepted.result = (teams, stats)
+        accepted.status = DONE
+        accepted.started_at = self.started_at
+        accepted._finish()
+        if self.manager is not None:
+            self.manager._register(accepted)
+        return accepted
+
+    def run_python(self, fn, *args, stoppable=True, **kwargs):
+        """Run a pure-Python engine in the manager's process pool (see LiveSolve.run_python)"""
+        if self.manager is None:
+            return super().run_python(fn, *args, stoppable=stoppable, **kwargs)
+        return self.manager._run_in_process(self, fn, args, kwargs, stoppable)
+
+    def wait_time(self):
+        """Seconds spent queued (so far, if it has not started)"""
+        return (self.started_at or time.time()) - self.submitted_at
+
+    def queue_position(self):
+        """1-based position among the queued jobs, or None once it runs"""
+        return self.manager.queue_position(self) if self.manager is not None and self.status == QUEUED else None
+
+    def _finish(self):
+        self.finished_at = time.time()
+        self.done = True
+
+
+class JobManager:
+    """Admission-controlled runner for solve jobs, with a registry to look them up by id"""
+
+    def __init__(self, max_concurrent=DEFAULT_MAX_CONCURRENT, policy=DEFAULT_QUEUE_POLICY):
+        if policy not in ('fair', 'fifo'):
+            raise ValueError(f"Unknown queue policy {policy!r} (use 'fair' or 'fifo')")
+        self.max_concurrent = max(1, max_concurrent)
+        self.policy = policy
+        self._jobs = {}
+        self._queues = {}  # session (None for 'fifo') -> deque of queued jobs
+        self._running = 0
+        self._running_by_session = {}
+        self._served = {}  # session -> dispatch turn it was last served at
+        self._turn = 0
+        self._lock = threading.Lock()
+        self._sequence = itertools.count(1)
+        self._wait_times = deque(maxlen=METRICS_WINDOW)
+        self._run_times = deque(maxlen=METRICS_WINDOW)
+        self._completed = 0
+        self._inflight = {}  # request fingerprint -> latest job for it
+        self._coalesced = 0
+        self._processes = None  # process pool for the pure-Python engines, started on first use
+        self._stop_flags = None
+        self._free_slots = []
+
+    def solver_workers(self, requested):
+        """CP-SAT workers for one solve: the requested number, capped at this slot's share of the cores"""
+        return max(1, min(requested, (os.cpu_count() or 1) // self.max_concurrent))
+
+    def submit(self, solve, label='', session=None, key=None):
+        """
+        Queue solve(job) and return the job
+
+        solve receives the job as its LiveSolve and returns (teams, stats),
+        which ends up in job.result (or the exception in job.error).
+        session identifies the submitter for the fair queue. key is the
+        request fingerprint: while a job with the same key is queued or
+        running (or finished less than DEBOUNCE_SECONDS ago) that job is
+        returned instead, so identical requests share one solve.
+        """
+        with self._lock:
+            self._prune()
+            existing = self._inflight.get(key) if key is not None else None
+            if existing is not None and self._joinable(existing):
+                existing.sessions.add(session)
+                self._coalesced += 1
+                return existing
+
+            job = SolveJob(label or f"Solve {next(self._sequence)}", session, key)
+            job.manager = self
+            job.solve = solve
+            if key is not None:
+                self._inflight[key] = job
+            self._jobs[job.id] = job
+            # 'fifo' puts every job in one queue
+            queue_key = session if self.policy == 'fair' else None
+            self._queues.setdefault(queue_key, deque()).append(job)
+            self._dispatch()
+        return job
+
+    def get(self, job_id):
+        """The job with this id, or None if it is unknown or expired"""
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def cancel(self, job_id, session=None):
+        job = self.get(job_id)
+        if job is not None:
+            job.cancel(session)
+        return job
+
+    def jobs(self):
+        """All known jobs, newest first"""
+        with self._lock:
+            return sorted(self._jobs.values(), key=lambda job: -job.submitted_at)
+
+    def queue_position(self, job):
+        """1-based position of a queued job in dispatch order, or None"""
+        with self._lock:
+            for position, queued in enumerate(self._dispatch_order(), start=1):
+                if queued is job:
+                    return position
+        return None
+
+    def metrics(self):
+        """Running and queued solves, wait and run times over the last METRICS_WINDOW jobs"""
+        with self._lock:
+            queued = [job for queue in self._queues.values() for job in queue]
+            waits = sorted(self._wait_times)
+            runs = list(self._run_times)
+            return {
+                'max_concurrent': self.max_concurrent,
+                'policy': self.policy,
+                'running': self._running,
+                'queue_depth': len(queued),
+                'sessions_waiting': sum(1 for queue in self._queues.values() if queue),
+                'oldest_wait': max((job.wait_time() for job in queued), default=0.0),
+                'mean_wait': sum(waits) / len(waits) if waits else 0.0,
+                'p95_wait': waits[min(len(waits) - 1, int(0.95 * len(waits)))] if waits else 0.0,
+                'mean_run': sum(runs) / len(runs) if runs else 0.0,
+                'completed': self._completed,
+                'coalesced': self._coalesced
+            }
+
+    def _joinable(self, job):
+        """Whether an identical request may attach to this job; lock held"""
+        if job.status == CANCELLED or job.stop_requested:
+            return False
+        if not job.done:
+            return True
+        return (
+            job.status == DONE
+            and time.time() - job.finished_at < DEBOUNCE_SECONDS
+            and not (job.result and job.result[1] and job.result[1].get('stopped_early'))
+        )
+
+    @staticmethod
+    def _pick(queues, running, served):
+        """Queue to serve next: fewest running jobs, then least recently served (None key is 'fifo')"""
+        waiting = [key for key, queue in queues.items() if queue]
+        if not waiting:
+            return None, False
+        return min(waiting, key=lambda key: (running.get(key, 0), served.get(key, -1))), True
+
+    def _dispatch_order(self):
+        """Queued jobs in the order they would start if the running solves kept running; lock held"""
+        queues = {key: deque(queue) for key, queue in self._queues.items()}
+        running, served = dict(self._running_by_session), dict(self._served)
+        order = []
+        turn = self._turn
+        key, found = self._pick(queues, running, served)
+        while found:
+            order.append(queues[key].popleft())
+            running[key] = running.get(key, 0) + 1
+            turn += 1
+            served[key] = turn
+            key, found = self._pick(queues, running, served)
+        return order
+
+    def _dispatch(self):
+        """Start queued jobs while slots are free; lock held"""
+        while self._running < self.max_concurrent:
+            key, found = self._pick(self._queues, self._running_by_session, self._served)
+            if not found:
+                return
+            job = self._queues[key].popleft()
+            if not self._queues[key]:
+                del self._queues[key]
+            self._turn += 1
+            self._served[key] = self._turn
+            self._running_by_session[key] = self._running_by_session.get(key, 0) + 1
+            self._running += 1
+            job.status = RUNNING
+            job.started_at = time.time()
+            self._wait_times.append(job.wait_time())
+            threading.Thread(target=self._run, args=(job,), name=f"solve-job-{job.id}", daemon=True).start()
+
+    def _run_in_process(self, job, fn, args, kwargs, stoppable):
+        """fn(*args, **kwargs) in a pool worker, with the job's stop() passed on through a shared flag"""
+        with self._lock:
+            if self._processes is None:
+                # Workers import the engines by module name, from this directory, with the
+                # sys.path they are spawned with
+                if ENGINES_DIR not in sys.path:
+                    sys.path.append(ENGINES_DIR)
+                # spawn: forking the server's threads (Streamlit, OR-Tools) is not safe
+                context = multiprocessing.get_context('spawn')
+                self._stop_flags = context.Array('b', self.max_concurrent, lock=False)
+                self._free_slots = list(range(self.max_concurrent))
+                self._processes = ProcessPoolExecutor(
+                    self.max_concurrent, mp_context=context, initializer=_init_worker, initargs=(self._stop_flags,)
+                )
+            slot = self._free_slots.pop() if self._free_slots else None
+        if slot is None:
+            # More engine runs than slots (a solve running several at once): this one stays in the thread
+            return super(SolveJob, job).run_python(fn, *args, stoppable=stoppable, **kwargs)
+        try:
+            self._stop_flags[slot] = 0
+            future = self._processes.submit(_run_in_worker, slot, fn, args, kwargs, stoppable)
+            while not wait([future], timeout=PROCESS_POLL_SECONDS).done:
+                if job.stop_requested:
+                    self._stop_flags[slot] = 1
+            return future.result()
+        finally:
+            with self._lock:
+                self._free_slots.append(slot)
+
+    def _register(self, job):
+        """Make a job created outside submit (see SolveJob.accept) available to get()"""
+        job.manager = self
+        with self._lock:
+            self._jobs[job.id] = job
+
+    def _dequeue(self, job):
+        """Remove a job that has not started yet; True if it was still queued"""
+        with self._lock:
+            for key, queue in self._queues.items():
+                if job in queue:
+                    queue.remove(job)
+                    if not queue:
+                        del self._queues[key]
+                    job.status = CANCELLED
+                    job._finish()
+                    return True
+        return False
+
+    def _run(self, job):
+        try:
+            job.result = job.solve(job)
+            if job.status != CANCELLED:
+                job.status = DONE
+        except Exception as e:
+            job.error = e
+            if job.status != CANCELLED:
+                job.status = FAILED
+        job._finish()
+        with self._lock:
+            key = job.session if self.policy == 'fair' else None
+            self._running_by_session[key] -= 1
+            if not self._running_by_session[key]:
+                del self._running_by_session[key]
+            self._running -= 1
+            self._completed += 1
+            self._run_times.append(job.finished_at - job.started_at)
+            self._dispatch()
+
+    def _prune(self):
+        now = time.time()
+        finished = sorted(
+            (job for job in self._jobs.values() if job.done),
+            key=lambda job: job.finished_at
+        )
+        for position, job in enumerate(finished):
+            if now - job.finished_at > JOB_RETENTION or len(finished) - position > MAX_FINISHED_JOBS:
+                del self._jobs[job.id]
+                if self._inflight.get(job.key) is job:
+                    del self._inflight[job.key]
@@ -0,0 +1,141 @@
+"""
+League-scale team balancing for hundreds or thousands of players.
+
+The CP-SAT model needs n_players x num_teams booleans, which is far too big
+for league nights with 500+ registrations and 50+ teams. This mode
+decomposes the problem instead:
+
+1. Balanced Largest Differencing builds the starting league.
+2. Large-neighbourhood search: two teams (one of them the current heaviest
+   or lightest) are merged and re-split optimally by the exact 2-way
+   partitioner. A re-split never widens the league range, and moves are
+   only accepted when they even out the totals, so the search cannot cycle.
+
+It stops at the analytic lower bound, at a local optimum over all team
+pairs, or when the time budget runs out.
+
+Usage:
+    python league.py roster.csv --teams 50 [--time-limit 10] [--output teams.json]
+"""
+import argparse
+import random
+import sys
+import time
+
+from balancing import scaled_player_scores
+from partitioning import balanced_largest_differencing, partition_balanced, range_lower_bound
+from storage import read_roster_csv, write_teams
+
+
+def balance_league(players, num_teams, time_limit=10.0, seed=0, scores=None, stop=None):
+    """
+    Balance a large roster within a fixed time budget
+
+    scores overrides the integer player scores (scaled_player_scores). stop
+    is an optional callable checked between re-splits; the search ends once
+    it returns True.
+
+    Returns (teams, stats); stats reports the range reached, the lower bound,
+    the number of accepted re-splits and the time used.
+    """
+    start = time.perf_counter()
+    deadline = start + time_limit
+    rng = random.Random(seed)
+
+    if scores is None:
+        scores = scaled_player_scores(players)
+    lower_bound = range_lower_bound(scores, num_teams)
+    assignment = balanced_largest_differencing(scores, num_teams)
+
+    members = [[] for _ in range(num_teams)]
+    totals = [0] * num_teams
+    for i, team in enumerate(assignment):
+        members[team].append(i)
+        totals[team] += scores[i]
+
+    def resplit(a, b):
+        """Re-split teams a and b optimally; True if the totals got more even"""
+        pooled = members[a] + members[b]
+        result = partition_balanced([scores[i] for i in pooled], 2, node_limit=20000, time_limit=0.05)
+        new_a = [i for i, side in zip(pooled, result['assignment']) if side == 0]
+        new_b = [i for i, side in zip(pooled, result['assignment']) if side == 1]
+        if len(new_a) != len(members[a]):
+            new_a, new_b = new_b, new_a
+        total_a = sum(scores[i] for i in new_a)
+        total_b = totals[a] + totals[b] - total_a
+        if abs(total_a - total_b) >= abs(totals[a] - totals[b]):
+            return False
+        members[a], members[b] = new_a, new_b
+        totals[a], totals[b] = total_a, total_b
+        return True
+
+    resplits = 0
+    rounds = 0
+    while time.perf_counter() < deadline and max(totals) - min(totals) > lower_bound:
+        if stop is not None and stop():
+            break
+        rounds += 1
+        heavy = max(range(num_teams), key=lambda t: totals[t])
+        light = min(range(num_teams), key=lambda t: totals[t])
+        if resplit(heavy, light):
+            resplits += 1
+            continue
+
+        # Heaviest-lightest pair is stuck: pair each extreme with every other team
+        improved = False
+        partners = [t for t in range(num_teams) if t not in (heavy, light)]
+        rng.shuffle(partners)
+        for extreme in (heavy, light):
+            for other in partners:
+                if time.perf_counter() >= deadline or (stop is not None and stop()):
+                    break
+                if resplit(extreme, other):
+                    resplits += 1
+                    improved = True
+                    break
+            if improved:
+                break
+        if not improved:
+            break  # local optimum over all pairs involving the extremes
+
+    teams = [[players[i] for i in sorted(team)] for team in members]
+    wall_time = time.perf_counter() - start
+    return teams, {
+        'range': (max(totals) - min(totals)) / 100,
+        'lower_bound': lower_bound / 100,
+        'optimal': max(totals) - min(totals) <= lower_bound,
+        'resplits': resplits,
+        'rounds': rounds,
+        'wall_time': wall_time,
+        'time_limit': time_limit
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Balance a league-size roster into many teams")
+    parser.add_argument('roster', help="CSV with name, position and stat columns")
+    parser.add_argument('--teams', type=int, required=True, help="number of teams")
+    parser.add_argument('--time-limit', type=float, default=10.0, help="time budget in seconds")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', help="write teams to this .json or .csv file")
+    args = parser.parse_args(argv)
+
+    players = read_roster_csv(args.roster)
+    if args.teams < 1 or args.teams > len(players):
+        parser.error(f"--teams must be between 1 and the number of players ({len(players)})")
+
+    teams, stats = balance_league(players, args.teams, args.time_limit, args.seed)
+
+    if args.output:
+        write_teams(args.output, teams, stats)
+
+    print(
+        f"Balanced {len(players)} players into {args.teams} teams: "
+        f"range {stats['range']:.2f} (lower bound {stats['lower_bound']:.2f}) "
+        f"in {stats['wall_time']:.2f}s of {args.time_limit:g}s, {stats['resplits']} re-splits",
+        file=sys.stderr
+    )
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,70 @@
+"""
+Anytime solves: improving lineups streamed while the solver runs.
+
+A LiveSolve is shared between a background solver thread (see jobs.py)
+and the UI. The solver publishes every improving incumbent with its range
+and the current bound; the UI polls latest() to show it, and stop() ends
+the search early so the best lineup so far becomes the result.
+"""
+import threading
+import time
+
+
+class LiveSolve:
+    """Progress and result of one running solve"""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.done = False
+        self.result = None
+        self.error = None
+        self.stop_requested = False
+        self._incumbent = None
+        self._solver = None
+        self._lock = threading.Lock()
+
+    def attach(self, solver):
+        """Register the running CP-SAT solver so stop() can interrupt it"""
+        with self._lock:
+            self._solver = solver
+            if self.stop_requested:
+                solver.StopSearch()
+
+    def publish(self, teams, info):
+        """
+        Record an improving lineup
+
+        info has 'range', 'bound' and 'wall_time', plus whichever other
+        solve stats (engine, time limit, seed...) the solver knows so far.
+        """
+        with self._lock:
+            self._incumbent = (teams, info)
+
+    def latest(self):
+        """(teams, info) of the best lineup so far, or None"""
+        with self._lock:
+            return self._incumbent
+
+    def stop(self):
+        """Accept the current lineup: end the search as soon as possible"""
+        with self._lock:
+            self.stop_requested = True
+            if self._solver is not None:
+                self._solver.StopSearch()
+
+    def run_python(self, fn, *args, stoppable=True, **kwargs):
+        """
+        Run a pure-Python engine, fn(*args, **kwargs), and return its result
+
+        With stoppable, fn also gets stop=, a callable that turns True once
+        stop() was called. Here fn runs in the calling thread; a
+        jobs.SolveJob runs it in its manager's process pool instead, since
+        such engines hold the GIL for their whole run.
+        """
+        if stoppable:
+            kwargs['stop'] = lambda: self.stop_requested
+        return fn(*args, **kwargs)
+
+    def elapsed(self):
+        return time.perf_counter() - self.started
+
@@ -0,0 +1,337 @@
+"""
+Local storage in an embedded SQLite database.
+
+Players, games, who played in which game (game_players), partnerships and
+conflicts live in indexed tables, so local mode reads and writes only the
+rows it needs: a page of game summaries, one game's teams, the games of
+one player or date range, the partners of one player. A roster save
+rewrites only the players that changed.
+
+The database runs in WAL mode, so every session of the server can read
+while one writes, and each thread gets its own connection. migrate()
+copies the JSON files the apps kept before (and a games .jsonl log) into
+an empty database, once.
+"""
+import json
+import os
+import sqlite3
+import threading
+import uuid
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT);
+
+CREATE TABLE IF NOT EXISTS players (
+    key TEXT PRIMARY KEY,  -- the player's id, or name (see player_keys)
+    seq INTEGER NOT NULL,  -- sorts the roster
+    id TEXT,
+    name TEXT NOT NULL,
+    position TEXT,
+    data TEXT NOT NULL  -- the player dict as JSON
+);
+CREATE INDEX IF NOT EXISTS players_name ON players (name);
+
+CREATE TABLE IF NOT EXISTS games (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,  -- save order
+    id TEXT NOT NULL UNIQUE,
+    created_at TEXT,
+    name TEXT,
+    num_teams INTEGER,
+    num_players INTEGER,
+    record TEXT NOT NULL,  -- the game dict without its teams, as JSON
+    teams TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS games_created_at ON games (created_at);
+
+CREATE TABLE IF NOT EXISTS game_players (
+    game_id TEXT NOT NULL REFERENCES games (id) ON DELETE CASCADE,
+    team_number INTEGER NOT NULL,
+    player_name TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS game_players_player ON game_players (player_name);
+CREATE INDEX IF NOT EXISTS game_players_game ON game_players (game_id);
+
+CREATE TABLE IF NOT EXISTS partnerships (player TEXT NOT NULL, other TEXT NOT NULL, PRIMARY KEY (player, other));
+CREATE TABLE IF NOT EXISTS conflicts (player TEXT NOT NULL, other TEXT NOT NULL, PRIMARY KEY (player, other));
+"""
+
+RELATION_TABLES = ('partnerships', 'conflicts')
+
+
+def player_keys(players):
+    """Stable key per player: the id if it has one, else the name (numbered if it repeats)"""
+    keys, seen = [], {}
+    for player in players:
+        key = str(player['id']) if player.get('id') else f"name:{player['name']}"
+        seen[key] = seen.get(key, 0) + 1
+        keys.append(key if seen[key] == 1 else f"{key}#{seen[key]}")
+    return keys
+
+
+def team_player_names(team):
+    """Player names of a saved team: {'players': [names]} (apple app) or a list of player dicts (enhanced app)"""
+    players = team.get('players', []) if isinstance(team, dict) else team
+    return [p['name'] if isinstance(p, dict) else p for p in players]
+
+
+class LocalDB:
+    """Players, games and relations in one SQLite file"""
+
+    def __init__(self, path):
+        self.path = path
+        self._local = threading.local()
+        self._write_lock = threading.Lock()  # one writer per process; readers never wait
+        with self._connection() as conn:
+            conn.executescript(SCHEMA)
+        self.games = GameTable(self)
+
+    def _connection(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')  # durable at every checkpoint, safe in WAL mode
+            conn.execute('PRAGMA foreign_keys=ON')
+            self._local.conn = conn
+        return conn
+
+    def query(self, sql, params=()):
+        return self._connection().execute(sql, params).fetchall()
+
+    def write(self, statements):
+        """Run (sql, params) or (sql, [params, ...]) statements in one transaction"""
+        self.transaction(lambda: (statements, None))
+
+    def transaction(self, build):
+        """
+        Run the statements build() returns in one transaction; returns build's result
+
+        build() returns (statements, result). The transaction (BEGIN
+        IMMEDIATE) takes the database's write lock before build runs, so
+        what build reads through query() cannot change under it, not even
+        from another process.
+        """
+        with self._write_lock, self._connection() as conn:
+            conn.execute('BEGIN IMMEDIATE')
+            statements, result = build()
+            for sql, params in statements:
+                if isinstance(params, list):
+                    conn.executemany(sql, params)
+                else:
+                    conn.execute(sql, params)
+        return result
+
+    def files(self):
+        """The database files; a commit changes the -wal file until a checkpoint moves it into the main one"""
+        return (self.path, self.path + '-wal')
+
+    # Players
+
+    def load_players(self):
+        """The roster in saved order"""
+        return [json.loads(data) for (data,) in self.query('SELECT data FROM players ORDER BY seq')]
+
+    def save_players(self, players):
+        """Save the roster, writing only the players that changed; returns how many rows were written"""
+        return self.transaction(lambda: self._player_statements(players))
+
+    def _player_statements(self, players):
+        """
+        Statements saving the roster, and how many rows they write
+
+        Players are matched by player_keys, so adding or removing one
+        leaves the others alone. They keep their stored seq while the
+        roster order allows it (new players go after the rest); only a
+        reordered roster renumbers everyone.
+        """
+        keys = player_keys(players)
+        known = {key: (seq, data) for key, seq, data in self.query('SELECT key, seq, data FROM players')}
+        next_seq = max((seq for seq, _ in known.values()), default=-1) + 1
+        seqs = []
+        for key in keys:
+            if key in known:
+                seqs.append(known[key][0])
+            else:
+                seqs.append(next_seq)
+                next_seq += 1
+        if any(a >= b for a, b in zip(seqs, seqs[1:])):
+            seqs = list(range(len(players)))
+
+        changed = []
+        for key, seq, player in zip(keys, seqs, players):
+            data = json.dumps(player, sort_keys=True)
+            if known.get(key) != (seq, data):
+                changed.append((key, seq, player.get('id'), player['name'], player.get('position'), data))
+        removed = [(key,) for key in known.keys() - set(keys)]
+        return [
+            ('INSERT OR REPLACE INTO players (key, seq, id, name, position, data) VALUES (?, ?, ?, ?, ?, ?)', changed),
+            ('DELETE FROM players WHERE key = ?', removed)
+        ], len(changed) + len(removed)
+
+    def find_players(self, name):
+        """Players with this name"""
+        return [json.loads(data) for (data,) in self.query('SELECT data FROM players WHERE name = ?', (name,))]
+
+    # Partnerships and conflicts: {player: [other players]}, stored one row per (player, other)
+
+    def load_relations(self, table):
+        assert table in RELATION_TABLES
+        relations = {}
+        for player, other in self.query(f'SELECT player, other FROM {table} ORDER BY rowid'):
+            relations.setdefault(player, []).append(other)
+        return relations
+
+    def save_relations(self, table, relations):
+        """Save partnerships or conflicts, inserting and deleting only the pairs that changed"""
+        self.transaction(lambda: (self._relation_statements(table, relations), None))
+
+    def _relation_statements(self, table, relations):
+        assert table in RELATION_TABLES
+        pairs = {(player, other) for player, others in relations.items() for other in others}
+        known = set(self.query(f'SELECT player, other FROM {table}'))
+        return [
+            (f'DELETE FROM {table} WHERE player = ? AND other = ?', sorted(known - pairs)),
+            (f'INSERT INTO {table} (player, other) VALUES (?, ?)', sorted(pairs - known))
+        ]
+
+    def related(self, table, player):
+        """The partners (or conflicts) of one player"""
+        assert table in RELATION_TABLES
+        rows = self.query(f'SELECT other FROM {table} WHERE player = ? ORDER BY rowid', (player,))
+        return [other for (other,) in rows]
+
+    # One-shot import
+
+    def migrate(self, players_file=None, games_file=None, partnerships_file=None, conflicts_file=None,
+                games_newest_first=True):
+        """
+        Copy the apps' JSON files into the database, once
+
+        games_file may be a JSON list (newest first if games_newest_first)
+        or have a .jsonl log next to it, which is read instead. Everything
+        goes in one transaction, and nothing happens once a migration has
+        run (in any process). The files are left as they are. Returns
+        whether it ran.
+        """
+        return self.transaction(lambda: self._migrate_statements(
+            players_file, games_file, partnerships_file, conflicts_file, games_newest_first
+        ))
+
+    def _migrate_statements(self, players_file, games_file, partnerships_file, conflicts_file, games_newest_first):
+        from storage import GameLog, load_json
+
+        if self.query("SELECT 1 FROM meta WHERE key = 'migrated'"):
+            return [], False
+        statements = []
+        if players_file:
+            statements += self._player_statements(load_json(players_file, []))[0]
+        if games_file:
+            log = GameLog(games_file)
+            if os.path.exists(log.path):
+                games = log.load(newest_first=False)
+            else:
+                games = load_json(games_file, [])
+                games = games[::-1] if games_newest_first else games
+            for game in games:
+                statements += self.games.insert_statements(game)[1]
+        for table, path in zip(RELATION_TABLES, (partnerships_file, conflicts_file)):
+            if path:
+                statements += self._relation_statements(table, load_json(path, {}))
+        statements.append(("INSERT INTO meta (key, value) VALUES ('migrated', datetime('now'))", ()))
+        return statements, True
+
+
+class GameTable:
+    """
+    Game history in a LocalDB, with the interface of storage.GameLog
+
+    Games come newest first (in save order); summaries leave out the teams,
+    which stay in their own column until get() asks for one game.
+    """
+
+    def __init__(self, db):
+        self.db = db
+
+    @staticmethod
+    def _game(record, teams=None):
+        game = json.loads(record)
+        if teams is not None:
+            game['teams'] = json.loads(teams)
+        return game
+
+    def count(self):
+        return self.db.query('SELECT COUNT(*) FROM games')[0][0]
+
+    def summaries(self, start, count):
+        """count games from the start-th newest, without their teams"""
+        rows = self.db.query('SELECT record FROM games ORDER BY seq DESC LIMIT ? OFFSET ?', (count, start))
+        return [self._game(record) for (record,) in rows]
+
+    def page(self, start, count):
+        """count games from the start-th newest (0 is the latest), newest first"""
+        rows = self.db.query('SELECT record, teams FROM games ORDER BY seq DESC LIMIT ? OFFSET ?', (count, start))
+        return [self._game(record, teams) for record, teams in rows]
+
+    def load(self, newest_first=True):
+        order = 'DESC' if newest_first else 'ASC'
+        rows = self.db.query(f'SELECT record, teams FROM games ORDER BY seq {order}')
+        return [self._game(record, teams) for record, teams in rows]
+
+    def get(self, game_id):
+        """The game with this id, or None"""
+        rows = self.db.query('SELECT record, teams FROM games WHERE id = ?', (str(game_id),))
+        return self._game(*rows[0]) if rows else None
+
+    def with_player(self, name):
+        """Games the player took part in, newest first"""
+        rows = self.db.query(
+            'SELECT record, teams FROM games WHERE id IN (SELECT game_id FROM game_players WHERE player_name = ?) '
+            'ORDER BY seq DESC', (name,)
+        )
+        return [self._game(record, teams) for record, teams in rows]
+
+    def between(self, start, end):
+        """Games created from start up to (not including) end, ISO dates or timestamps, newest first"""
+        rows = self.db.query(
+            'SELECT record, teams FROM games WHERE created_at >= ? AND created_at < ? ORDER BY created_at DESC',
+            (start, end)
+        )
+        return [self._game(record, teams) for record, teams in rows]
+
+    def append(self, game):
+        """Add a game (given an id if it has none); returns the game as stored"""
+        game, statements = self.insert_statements(game)
+        self.db.write(statements)
+        return game
+
+    def insert_statements(self, game):
+        game = game if game.get('id') else {'id': uuid.uuid4().hex, **game}
+        game_id = str(game['id'])
+        teams = game.get('teams', [])
+        record = {key: value for key, value in game.items() if key != 'teams'}
+        return game, [
+            (
+                'INSERT INTO games (id, created_at, name, num_teams, num_players, record, teams) '
+                'VALUES (?, ?, ?, ?, ?, ?, ?)',
+                (
+                    game_id, game.get('created_at') or game.get('date'), game.get('name'), len(teams),
+                    game.get('num_players', game.get('total_players')), json.dumps(record), json.dumps(teams)
+                )
+            ),
+            (
+                'INSERT INTO game_players (game_id, team_number, player_name) VALUES (?, ?, ?)',
+                [
+                    (game_id, number, name)
+                    for number, team in enumerate(teams, 1) for name in team_player_names(team)
+                ]
+            )
+        ]
+
+    def delete(self, game_id):
+        """Delete a game (and its game_players rows); False if there is no such game"""
+        def build():
+            if not self.db.query('SELECT 1 FROM games WHERE id = ?', (str(game_id),)):
+                return [], False
+            return [('DELETE FROM games WHERE id = ?', (str(game_id),))], True
+
+        return self.db.transaction(build)
@@ -0,0 +1,52 @@
+"""
+Background pre-warming of the heavy modules.
+
+The apps import NumPy, pandas, OR-Tools and PuLP only on the pages that
+use them, so the home page renders without paying for them. Once the
+first page is out, prewarm() imports them in a daemon thread while the
+user browses, so they are usually loaded by the time a page solves. A page
+that needs a module the thread is still importing waits for that import
+(Python's import lock); nothing is imported twice.
+
+PREWARM_MODULES overrides the list (comma-separated); set it empty to turn
+pre-warming off.
+"""
+import importlib
+import os
+import threading
+import time
+
+# backends pulls in NumPy (features, swap_search); the solvers load on their own
+DEFAULT_PREWARM_MODULES = ('backends', 'result_cache', 'ortools.sat.python.cp_model', 'pulp', 'pandas')
+
+
+def prewarm_modules():
+    """Modules to pre-warm: PREWARM_MODULES if set, otherwise DEFAULT_PREWARM_MODULES"""
+    raw = os.getenv('PREWARM_MODULES')
+    if raw is None:
+        return list(DEFAULT_PREWARM_MODULES)
+    return [name.strip() for name in raw.split(',') if name.strip()]
+
+
+def prewarm(modules=None):
+    """
+    Import modules in a background thread
+
+    Returns a dict filled in as the thread goes: module name -> seconds
+    the import took, or the exception if it failed (e.g. PuLP not installed).
+    """
+    modules = prewarm_modules() if modules is None else list(modules)
+    timings = {}
+
+    def run():
+        for name in modules:
+            start = time.perf_counter()
+            try:
+                importlib.import_module(name)
+                timings[name] = time.perf_counter() - start
+            except Exception as e:
+                timings[name] = e
+
+    if modules:
+        threading.Thread(target=run, name='prewarm', daemon=True).start()
+    return timings
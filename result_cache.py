@@ -0,0 +1,172 @@
+"""
+Memoized balancing results.
+
+A result is keyed by a canonical fingerprint of everything that decides
+it: the selected players' stats, the team count, locks, partnerships,
+conflicts and the solver settings. Entries live in an in-memory LRU and,
+optionally, in a JSON file so identical requests are answered instantly
+across sessions and restarts.
+
+Lineups are stored as player names and rebuilt from the current roster,
+so a hit always hands back the caller's own player dicts.
+"""
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:  # Windows: saves are still merged, just not under a lock
+    fcntl = None
+
+
+DEFAULT_MAX_ENTRIES = 256
+
+
+def balance_fingerprint(players, num_teams, locked_assignments=None, partnerships=None,
+                        conflicts=None, settings=None):
+    """
+    Canonical hash of a balancing request
+
+    Player order, dict order and relations that do not involve two selected
+    players do not change the fingerprint.
+    """
+    from features import STAT_COLUMNS, STAT_DEFAULTS
+
+    names = {p['name'] for p in players}
+
+    def pairs(relations):
+        return sorted({
+            tuple(sorted((name, other)))
+            for name, others in (relations or {}).items() if name in names
+            for other in others if other in names and other != name
+        })
+
+    request = {
+        'players': sorted(
+            [p['name'], p.get('position', 'Midfielder')] + [p.get(stat, STAT_DEFAULTS[stat]) for stat in STAT_COLUMNS]
+            for p in players
+        ),
+        'num_teams': num_teams,
+        'locks': sorted([name, team] for name, team in (locked_assignments or {}).items() if name in names),
+        'partnerships': pairs(partnerships),
+        'conflicts': pairs(conflicts),
+        'settings': settings or {}
+    }
+    encoded = json.dumps(request, sort_keys=True, separators=(',', ':'), default=str)
+    return hashlib.sha256(encoded.encode('utf-8')).hexdigest()
+
+
+def teams_to_names(teams):
+    """Lineup as lists of player names (what the cache stores)"""
+    return [[p['name'] for p in team] for team in teams]
+
+
+def teams_from_names(players, team_names):
+    """Rebuild a stored lineup from the current roster, or None if a player is missing"""
+    by_name = {p['name']: p for p in players}
+    if any(name not in by_name for team in team_names for name in team):
+        return None
+    return [[by_name[name] for name in team] for team in team_names]
+
+
+class ResultCache:
+    """
+    Thread-safe LRU of JSON-serializable results with an optional file store
+
+    The file is read once on creation and rewritten after every insert, so
+    the app can be restarted without losing results. Both apps (and several
+    server processes) may share one file: a save merges in the entries
+    other processes wrote since, under a lock file, instead of overwriting
+    them. Without a path the cache is memory-only.
+    """
+
+    def __init__(self, path=None, max_entries=DEFAULT_MAX_ENTRIES):
+        self.path = path
+        self.max_entries = max(1, max_entries)
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._load()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, key):
+        """Stored result for key (marked most recently used), or None"""
+        with self._lock:
+            if key not in self._entries:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return self._entries[key]
+
+    def put(self, key, result):
+        """Store a result, evicting the least recently used entries past max_entries"""
+        with self._lock:
+            self._entries[key] = result
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+            self._save()
+
+    def clear(self):
+        """Drop every entry (and the file contents)"""
+        with self._lock:
+            self._entries.clear()
+            self._save(merge=False)
+
+    def _read_file(self):
+        """Stored (key, result) pairs, oldest first"""
+        if not self.path or not os.path.exists(self.path):
+            return []
+        try:
+            with open(self.path, 'r') as f:
+                return json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"Ignoring unreadable result cache {self.path}: {e}")
+            return []
+
+    def _load(self):
+        # Stored oldest first, so the LRU order survives a restart
+        for key, result in self._read_file()[-self.max_entries:]:
+            self._entries[key] = result
+
+    @contextmanager
+    def _file_lock(self):
+        """Exclusive lock on the cache file between processes (no-op without fcntl)"""
+        if fcntl is None:
+            yield
+            return
+        with open(f"{self.path}.lock", 'w') as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock, fcntl.LOCK_UN)
+
+    def _save(self, merge=True):
+        if not self.path:
+            return
+        tmp_path = f"{self.path}.{os.getpid()}.tmp"
+        try:
+            with self._file_lock():
+                if merge:
+                    # Entries only the file has (other processes' results) count as older than ours
+                    merged = OrderedDict(
+                        (key, result) for key, result in self._read_file() if key not in self._entries
+                    )
+                    merged.update(self._entries)
+                    while len(merged) > self.max_entries:
+                        merged.popitem(last=False)
+                    self._entries = merged
+                with open(tmp_path, 'w') as f:
+                    json.dump(list(self._entries.items()), f)
+                os.replace(tmp_path, self.path)
+        except OSError as e:
+            print(f"Could not write result cache {self.path}: {e}")
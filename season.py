@@ -0,0 +1,249 @@
+"""
+Season planning: balanced teams for many matchdays with teammate rotation.
+
+Every matchday is balanced as usual, but players who have already been
+teammates (in the game history or on an earlier matchday of the plan)
+are kept apart where the balance allows it:
+
+1. The exact partitioner finds the best range for the matchday's attendees.
+2. CP-SAT re-solves the balance model with the range capped at that best
+   plus season_tolerance score points, minimizing repeated teammate pairs
+   (weighted by how often each pair has played together) and then the range.
+
+A matchday only depends on earlier matchdays it shares two or more players
+with. Matchdays are grouped into waves of mutually independent ones, and
+each wave is solved in parallel (CP-SAT runs outside the GIL), so separate
+groups or pitches plan side by side while a regular weekly group rotates
+week after week.
+
+Usage:
+    python season.py roster.csv matchdays.json --teams 2 [--history games.json] [--output season.json]
+"""
+import argparse
+import json
+import sys
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from itertools import combinations
+
+from balancing import (
+    DEFAULT_SOLVER_SETTINGS, build_balance_model, create_solver, scaled_player_scores, teams_from_assignment
+)
+from partitioning import partition_balanced
+
+
+def teammate_counts(games):
+    """How often each pair of players shared a team, from game records (load_games format)"""
+    counts = Counter()
+    for game in games or []:
+        for team in game.get('teams', []):
+            names = team['players'] if isinstance(team, dict) else team
+            counts.update(pair_key(a, b) for a, b in combinations(names, 2))
+    return counts
+
+
+def pair_key(a, b):
+    return (a, b) if a < b else (b, a)
+
+
+def dependency_waves(matchdays):
+    """
+    Group matchday indices into waves that can be solved in parallel
+
+    A matchday goes one wave after the latest earlier matchday it shares a
+    possible teammate pair (two or more players) with.
+    """
+    attendees = [set(names) for names in matchdays]
+    level = []
+    for k, names in enumerate(attendees):
+        level.append(1 + max((level[j] for j in range(k) if len(names & attendees[j]) >= 2), default=-1))
+    waves = [[] for _ in range(max(level, default=-1) + 1)]
+    for k, wave in enumerate(level):
+        waves[wave].append(k)
+    return waves
+
+
+def balance_matchday(players, num_teams, counts, settings=None, scores=None):
+    """
+    Balance one matchday, keeping frequent teammates apart within the range tolerance
+
+    counts maps name pairs (pair_key) to how often they were teammates.
+    Returns (teams, stats); stats reports the range, the best range found
+    by the partitioner, the repeated pairs and their weighted count.
+    """
+    from ortools.sat.python import cp_model
+
+    settings = {**DEFAULT_SOLVER_SETTINGS, **(settings or {})}
+    start = time.perf_counter()
+    n_players = len(players)
+    if n_players < num_teams:
+        return None, None
+    if scores is None:
+        scores = scaled_player_scores(players)
+
+    exact = partition_balanced(scores, num_teams, time_limit=settings['season_time_limit'] / 4)
+    cap = exact['range'] + round(settings['season_tolerance'] * 100)
+
+    # Tied players are not interchangeable here (they have different teammates), so only team labels are fixed
+    built = build_balance_model(
+        players, num_teams, settings, exact['assignment'], 'exact partition', scores, tie_order=False
+    )
+    model, x = built['model'], built['assignments']
+    model.Add(built['spread'] <= cap)
+
+    # together[i, k] is forced on when players i and k share any team
+    weighted = []
+    names = [p['name'] for p in players]
+    for i, k in combinations(range(n_players), 2):
+        weight = counts.get(pair_key(names[i], names[k]), 0)
+        if weight:
+            together = model.NewBoolVar(f'together_{i}_{k}')
+            for j in range(num_teams):
+                model.AddBoolOr([x[(i, j)].Not(), x[(k, j)].Not(), together])
+            weighted.append((weight, together))
+
+    # Rotation first, then the range (which never exceeds cap)
+    repeats = sum(weight * together for weight, together in weighted)
+    model.Minimize(repeats * (cap + 1) + built['spread'])
+
+    solver = create_solver(settings, time_limit=settings['season_time_limit'])
+    status = solver.Solve(model)
+    if status in (cp_model.OPTIMAL, cp_model.FEASIBLE):
+        assignment = [next(j for j in range(num_teams) if solver.Value(x[(i, j)])) for i in range(n_players)]
+    else:
+        assignment = built['hint']  # no time to improve on the partition
+
+    teams = teams_from_assignment(players, assignment, num_teams)
+    totals = [sum(scores[i] for i in range(n_players) if assignment[i] == j) for j in range(num_teams)]
+    repeated = [
+        pair for team in teams for pair in (pair_key(a['name'], b['name']) for a, b in combinations(team, 2))
+        if counts.get(pair)
+    ]
+    return teams, {
+        'status': solver.StatusName(status),
+        'range': (max(totals) - min(totals)) / 100,
+        'best_range': exact['range'] / 100,
+        'repeated_pairs': len(repeated),
+        'repeats': sum(counts[pair] for pair in repeated),
+        'wall_time': time.perf_counter() - start
+    }
+
+
+def plan_season(roster, matchdays, num_teams, history=None, settings=None, max_parallel=None):
+    """
+    Balanced teams for every matchday of a season
+
+    roster is the list of player dicts, matchdays a list of attendance
+    lists (player names) in date order and num_teams the team count for
+    every matchday, or a list with one count per matchday. history is
+    optional past games (load_games format) whose teammate pairs count as
+    repeats from the start.
+
+    Returns (plan, stats): plan has (teams, stats) per matchday, stats the
+    repeats over the season, the waves and the time used.
+    """
+    settings = {**DEFAULT_SOLVER_SETTINGS, **(settings or {})}
+    start = time.perf_counter()
+    by_name = {p['name']: p for p in roster}
+    unknown = sorted({name for names in matchdays for name in names if name not in by_name})
+    if unknown:
+        raise ValueError(f"Unknown players in the matchdays: {', '.join(unknown)}")
+    if isinstance(num_teams, int):
+        num_teams = [num_teams] * len(matchdays)
+    if len(num_teams) != len(matchdays):
+        raise ValueError("num_teams needs one team count per matchday")
+
+    counts = teammate_counts(history)
+    waves = dependency_waves(matchdays)
+    widest = max((len(wave) for wave in waves), default=1)
+    max_parallel = max(1, min(max_parallel or settings['num_workers'], widest))
+    # Parallel matchdays share the cores
+    matchday_settings = {**settings, 'num_workers': max(1, settings['num_workers'] // max_parallel)}
+
+    def solve(k):
+        return balance_matchday([by_name[name] for name in matchdays[k]], num_teams[k], counts, matchday_settings)
+
+    plan = [None] * len(matchdays)
+    with ThreadPoolExecutor(max_workers=max_parallel) as pool:
+        for wave in waves:
+            # Matchdays in a wave share no pair, so they read counts the others do not change
+            for k, result in zip(wave, pool.map(solve, wave)):
+                plan[k] = result
+            for k in wave:
+                teams = plan[k][0] or []
+                counts.update(pair_key(a['name'], b['name']) for team in teams for a, b in combinations(team, 2))
+
+    solved = [stats for _, stats in plan if stats]
+    return plan, {
+        'matchdays': len(matchdays),
+        'waves': len(waves),
+        'max_parallel': max_parallel,
+        'repeated_pairs': sum(stats['repeated_pairs'] for stats in solved),
+        'repeats': sum(stats['repeats'] for stats in solved),
+        'max_together': max(counts.values(), default=0),
+        'worst_range': max((stats['range'] for stats in solved), default=None),
+        'wall_time': time.perf_counter() - start
+    }
+
+
+def main(argv=None):
+    from storage import GameLog, read_roster
+
+    parser = argparse.ArgumentParser(description="Plan balanced, rotating teams for a season of matchdays")
+    parser.add_argument('roster', help="roster CSV (name, position and stat columns) or players JSON")
+    parser.add_argument('matchdays', help="JSON list of attendance lists (player names), one per matchday")
+    parser.add_argument('--teams', type=int, default=2, help="number of teams per matchday")
+    parser.add_argument('--history', help="games JSON or .jsonl log (as saved by the apps) whose teammates count as repeats")
+    parser.add_argument('--tolerance', type=float, default=DEFAULT_SOLVER_SETTINGS['season_tolerance'],
+                        help="score points a matchday may give up on its best range to rotate teammates")
+    parser.add_argument('--time-limit', type=float, default=DEFAULT_SOLVER_SETTINGS['season_time_limit'],
+                        help="time budget per matchday in seconds")
+    parser.add_argument('--output', help="write the plan to this .json file")
+    args = parser.parse_args(argv)
+
+    roster = read_roster(args.roster)
+    with open(args.matchdays) as f:
+        matchdays = json.load(f)
+    history = None
+    if args.history and args.history.endswith('.jsonl'):
+        history = GameLog(args.history).load()
+    elif args.history:
+        with open(args.history) as f:
+            history = json.load(f)
+
+    settings = {'season_tolerance': args.tolerance, 'season_time_limit': args.time_limit}
+    try:
+        plan, stats = plan_season(roster, matchdays, args.teams, history, settings)
+    except ValueError as e:
+        parser.error(str(e))
+
+    games = [
+        {
+            'matchday': k + 1,
+            'teams': [
+                {'team_number': idx + 1, 'players': [p['name'] for p in team]}
+                for idx, team in enumerate(teams or [])
+            ],
+            'stats': matchday_stats
+        }
+        for k, (teams, matchday_stats) in enumerate(plan)
+    ]
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump({'matchdays': games, 'stats': stats}, f, indent=2)
+    else:
+        json.dump(games, sys.stdout, indent=2)
+        print()
+
+    print(
+        f"Planned {stats['matchdays']} matchdays in {stats['waves']} waves "
+        f"({stats['max_parallel']} in parallel): {stats['repeated_pairs']} repeated teammate pairs, "
+        f"no pair together more than {stats['max_together']} times, "
+        f"worst range {stats['worst_range']} in {stats['wall_time']:.2f}s",
+        file=sys.stderr
+    )
+
+
+if __name__ == '__main__':
+    main()
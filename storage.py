@@ -0,0 +1,733 @@
+"""
+Player and game storage shared by the apps and the command line.
+
+Players and games live in Supabase when it is configured and reachable,
+otherwise in local files (the games in an append-only GameLog). A Supabase error is reported through
+on_error (the apps pass st.error) and the local files take over. One
+Supabase client (with its keep-alive HTTP connections) serves the whole
+process; SupabasePool health-checks it in the background. Rosters
+can also be read from a CSV like example_players.csv, and lineups written
+as JSON or CSV.
+"""
+import copy
+import csv
+import json
+import os
+import threading
+import time
+import uuid
+from datetime import datetime
+
+LOCAL_PLAYERS_FILE = "players.json"
+LOCAL_GAMES_FILE = "games.json"
+LOCAL_DB_FILE = "team_balance.db"
+
+# Supabase health checks: every HEALTH_CHECK_INTERVAL seconds while it answers,
+# otherwise after HEALTH_CHECK_RETRY seconds, doubling up to HEALTH_CHECK_MAX_BACKOFF
+HEALTH_CHECK_INTERVAL = 60.0
+HEALTH_CHECK_RETRY = 5.0
+HEALTH_CHECK_MAX_BACKOFF = 300.0
+
+# Player columns of the Supabase players table and the defaults written for missing values
+PLAYER_FIELDS = {
+    'name': None,
+    'position': 'Midfielder',
+    'running_ability': 5,
+    'goal_scoring': 5,
+    'age': 25,
+    'height': 175,
+    'overall_skill': 5
+}
+# Rows per upsert request (PostgREST takes a JSON array per request)
+UPSERT_CHUNK_SIZE = 500
+
+# A game log compacts itself once it holds this many dead lines and they outnumber the live games
+COMPACT_MIN_DEAD_LINES = 100
+
+# Loaded players and games are shared by every session until a write through the store,
+# a change to the local file or, for Supabase (which other servers may write), this many seconds
+CACHE_TTL = 30.0
+
+# Games per page of the history, and the columns a page loads (the teams load per game)
+HISTORY_PAGE_SIZE = 20
+GAME_SUMMARY_COLUMNS = 'id, created_at, num_teams, total_players'
+
+# Stat columns of a roster CSV (the app's export format)
+ROSTER_COLUMNS = ['running_ability', 'goal_scoring', 'age', 'height', 'overall_skill']
+
+
+def load_json(path, default):
+    """Contents of a JSON file, or default if it does not exist"""
+    if os.path.exists(path):
+        with open(path, 'r') as f:
+            return json.load(f)
+    return default
+
+
+def save_json(path, data):
+    with open(path, 'w') as f:
+        json.dump(data, f, indent=2)
+
+
+def file_stamp(path):
+    """(mtime, size) of a file, or None if it does not exist"""
+    try:
+        stat = os.stat(path)
+        return stat.st_mtime_ns, stat.st_size
+    except OSError:
+        return None
+
+
+def local_game_id(game):
+    """Id of a game in the local history (games saved before the log had ids go by their timestamp)"""
+    return str(game.get('id') or game.get('created_at') or game.get('date'))
+
+
+class GameLog:
+    """
+    Append-only local game history in a JSON Lines file
+
+    One game per line, oldest first. Saving a game appends its line and
+    deleting one appends a tombstone ({"deleted": id}), so either costs the
+    same however long the history is, and a crash can only lose the line
+    being written (a torn last line is skipped). The log keeps the byte
+    offset of every live game, so count(), get() and newest-first page()
+    read only the lines they return; the offsets are picked up from lines
+    appended by other processes too.
+
+    Deleted games and their tombstones stay in the file until compact()
+    rewrites it (atomically). That happens by itself once there are at
+    least COMPACT_MIN_DEAD_LINES dead lines and they outnumber the games.
+
+    Given a .json path, the log lives next to it (.jsonl) and is seeded from
+    that JSON history (newest first if legacy_newest_first) on first use;
+    the JSON file is left as it was.
+    """
+
+    def __init__(self, path, legacy_newest_first=True):
+        if path.endswith('.json'):
+            self.legacy, self.path = path, path + 'l'
+        else:
+            self.legacy, self.path = None, path
+        self.legacy_newest_first = legacy_newest_first
+        self.dead_lines = 0
+        self._offsets = {}  # game id -> (offset, length) of its line, oldest first
+        self._file = None  # (inode, bytes scanned) of the file the offsets describe
+        self._lock = threading.RLock()
+
+    def _refresh(self):
+        """Bring the offsets up to date with the file"""
+        try:
+            stat = os.stat(self.path)
+        except FileNotFoundError:
+            if self.legacy and os.path.exists(self.legacy):
+                games = load_json(self.legacy, [])
+                self._rewrite(reversed(games) if self.legacy_newest_first else games)
+            else:
+                self._offsets, self._file, self.dead_lines = {}, None, 0
+            return
+        reset = self._file is None or self._file[0] != stat.st_ino or self._file[1] > stat.st_size
+        if reset:
+            self._offsets, self.dead_lines = {}, 0
+        start = 0 if reset else self._file[1]  # same file: only read what was appended since
+        if reset or start < stat.st_size:
+            with open(self.path, 'rb') as f:
+                f.seek(start)
+                self._scan(f, start)
+
+    def _scan(self, f, offset):
+        end = offset
+        for line in f:
+            if not line.endswith(b'\n'):
+                break  # torn or still being written: picked up (or skipped) once its newline is there
+            self._read_line(line, offset)
+            offset += len(line)
+            end = offset
+        self._file = (os.fstat(f.fileno()).st_ino, end)
+
+    def _read_line(self, line, offset):
+        try:
+            record = json.loads(line)
+        except ValueError:
+            self.dead_lines += 1
+            return
+        if 'deleted' in record:
+            if self._offsets.pop(str(record['deleted']), None) is not None:
+                self.dead_lines += 1
+            self.dead_lines += 1
+        else:
+            self._offsets[local_game_id(record)] = (offset, len(line))
+
+    def _read(self, offsets):
+        with open(self.path, 'rb') as f:
+            games = []
+            for offset, length in offsets:
+                f.seek(offset)
+                games.append(json.loads(f.read(length)))
+            return games
+
+    def _append(self, record):
+        line = (json.dumps(record) + '\n').encode()
+        with open(self.path, 'ab') as f:
+            size = f.tell()
+            prefix = b''
+            if size > (self._file[1] if self._file is not None else 0):
+                # Other processes appended since the offsets were read: index their lines. A last
+                # line still without its newline is torn by a crash; end it, so it is skipped
+                # rather than glued to this one.
+                self._refresh()
+                with open(self.path, 'rb') as tail:
+                    tail.seek(size - 1)
+                    if tail.read(1) != b'\n':
+                        prefix = b'\n'
+            f.write(prefix + line)
+            f.flush()
+            os.fsync(f.fileno())
+            # Appends land at the end of the file, wherever other processes left it
+            end = f.tell()
+            if end - len(line) - len(prefix) == size:
+                # Nothing landed in between, so the offsets now cover the file up to this line
+                self._file = (os.fstat(f.fileno()).st_ino, end)
+                self.dead_lines += bool(prefix)
+        return end - len(line), len(line)
+
+    def _rewrite(self, games):
+        """Replace the log with these games (oldest first), giving ids to those without"""
+        temp = self.path + '.tmp'
+        offsets, offset = {}, 0
+        with open(temp, 'wb') as f:
+            for game in games:
+                if isinstance(game, bytes):
+                    line = game
+                    game_id = local_game_id(json.loads(line))
+                else:
+                    game = game if game.get('id') else {'id': uuid.uuid4().hex, **game}
+                    line = (json.dumps(game) + '\n').encode()
+                    game_id = game['id']
+                f.write(line)
+                offsets[game_id] = (offset, len(line))
+                offset += len(line)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp, self.path)
+        self._offsets, self.dead_lines = offsets, 0
+        self._file = (os.stat(self.path).st_ino, offset)
+
+    def count(self):
+        with self._lock:
+            self._refresh()
+            return len(self._offsets)
+
+    def page(self, start, count):
+        """count games from the start-th newest (0 is the latest), newest first"""
+        with self._lock:
+            self._refresh()
+            offsets = list(self._offsets.values())
+            end = len(offsets) - start
+            return self._read(reversed(offsets[max(0, end - count):max(0, end)]))
+
+    def summaries(self, start, count):
+        """Like page() but without the teams"""
+        return [
+            {**{key: value for key, value in game.items() if key != 'teams'}, 'id': local_game_id(game)}
+            for game in self.page(start, count)
+        ]
+
+    def load(self, newest_first=True):
+        """Every game"""
+        with self._lock:
+            self._refresh()
+            offsets = list(self._offsets.values())
+            return self._read(reversed(offsets) if newest_first else offsets)
+
+    def get(self, game_id):
+        """The game with this id, or None"""
+        with self._lock:
+            self._refresh()
+            offsets = self._offsets.get(str(game_id))
+            return self._read([offsets])[0] if offsets else None
+
+    def append(self, game):
+        """Add a game (given an id if it has none); returns the game as stored"""
+        game = game if game.get('id') else {'id': uuid.uuid4().hex, **game}
+        with self._lock:
+            self._refresh()
+            self._offsets[local_game_id(game)] = self._append(game)
+        return game
+
+    def delete(self, game_id):
+        """Delete a game with a tombstone; False if there is no such game"""
+        game_id = str(game_id)
+        with self._lock:
+            self._refresh()
+            if game_id not in self._offsets:
+                return False
+            self._append({'deleted': game_id})
+            del self._offsets[game_id]
+            self.dead_lines += 2
+            if self.dead_lines >= COMPACT_MIN_DEAD_LINES and self.dead_lines > len(self._offsets):
+                self.compact()
+        return True
+
+    def compact(self):
+        """Rewrite the log with only the live games"""
+        with self._lock:
+            self._refresh()
+            offsets = list(self._offsets.values())
+            with open(self.path, 'rb') as f:
+                lines = []
+                for offset, length in offsets:
+                    f.seek(offset)
+                    lines.append(f.read(length))
+            self._rewrite(lines)
+
+
+def supabase_credentials(secrets=None):
+    """
+    (url, key) of the Supabase project
+
+    Looked up in a [supabase] section of secrets, then at its root, then in
+    the SUPABASE_URL and SUPABASE_KEY environment variables.
+    """
+    url = key = ""
+    try:
+        section = secrets["supabase"] if "supabase" in secrets else secrets
+        url = section.get("SUPABASE_URL", "")
+        key = section.get("SUPABASE_KEY", "")
+    except Exception:
+        pass  # no secrets file
+    return url or os.getenv("SUPABASE_URL", ""), key or os.getenv("SUPABASE_KEY", "")
+
+
+class SupabasePool:
+    """
+    One Supabase client per process, shared by every session
+
+    The client is created once, so its HTTP keep-alive connections are
+    reused by every request. start() runs one test query and then keeps
+    checking in a daemon thread, on an interval while Supabase answers and
+    with exponential backoff while it does not; page runs only read the
+    last result.
+    """
+
+    def __init__(self, url, key, interval=HEALTH_CHECK_INTERVAL, retry=HEALTH_CHECK_RETRY,
+                 max_backoff=HEALTH_CHECK_MAX_BACKOFF):
+        self.url = url
+        self.key = key
+        self.interval = interval
+        self.retry = retry
+        self.max_backoff = max_backoff
+        self.healthy = False
+        self.failures = 0
+        self.last_error = None
+        self.last_check = None
+        self._client = None
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._thread = None
+
+    @property
+    def client(self):
+        """The shared client if the last health check passed, otherwise None"""
+        return self._client if self.healthy else None
+
+    def check(self):
+        """Run the test query now; True if Supabase answered"""
+        with self._lock:
+            try:
+                if self._client is None:
+                    from supabase import create_client
+                    self._client = create_client(self.url, self.key)
+                self._client.table('players').select("count", count='exact').limit(1).execute()
+            except Exception as e:
+                if self.healthy or not self.failures:
+                    print(f"Supabase connection failed: {e}")
+                self.healthy = False
+                self.failures += 1
+                self.last_error = e
+            else:
+                self.healthy = True
+                self.failures = 0
+                self.last_error = None
+            self.last_check = time.time()
+            return self.healthy
+
+    def next_check_in(self):
+        """Seconds until the next background check"""
+        if self.healthy:
+            return self.interval
+        return min(self.max_backoff, self.retry * 2 ** (self.failures - 1))
+
+    def start(self):
+        """Check once now, then keep checking in the background; returns self"""
+        if self._thread is None:
+            self.check()
+            self._thread = threading.Thread(target=self._run, name='supabase-health', daemon=True)
+            self._thread.start()
+        return self
+
+    def check_soon(self):
+        """Wake the background thread for a check now (e.g. after a failed request)"""
+        self._wake.set()
+
+    def _run(self):
+        while True:
+            self._wake.wait(self.next_check_in())
+            self._wake.clear()
+            self.check()
+
+
+def player_row(player):
+    """The players-table columns of a player, with defaults for missing values"""
+    return {field: player.get(field, default) for field, default in PLAYER_FIELDS.items()}
+
+
+class Storage:
+    """
+    Players and game history in Supabase (when connected) or local files
+
+    Locally, players are a JSON file and games a GameLog next to games_file
+    (games.json becomes games.jsonl), or, given a LocalDB, both live in
+    SQLite (the JSON files and log are migrated into it on first use).
+
+    Pass a client, or a SupabasePool to follow its health checks. The store
+    remembers the Supabase rows it last loaded or wrote, so save_players
+    only sends the players that changed since.
+
+    Loaded players and games are cached: local files until their mtime
+    changes (the database's -wal file for SQLite), Supabase data until a write through this store bumps its
+    version or cache_ttl seconds pass. Share one store between sessions
+    and most page runs read no file and make no request.
+    """
+
+    def __init__(self, client=None, players_file=LOCAL_PLAYERS_FILE, games_file=LOCAL_GAMES_FILE, on_error=print,
+                 pool=None, cache_ttl=CACHE_TTL, db=None):
+        self._client = client
+        self.pool = pool
+        self.players_file = players_file
+        self.games_file = games_file
+        self.db = db
+        if db is not None:
+            db.migrate(players_file, games_file)
+            self.local_games = db.games
+            self._local_files = {'players': db.files(), 'games': db.files()}
+        else:
+            self.local_games = GameLog(games_file)
+            self._local_files = {'players': (players_file,), 'games': (self.local_games.path,)}
+        self.on_error = on_error
+        self.cache_ttl = cache_ttl
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self._known_rows = {}  # player id -> row as last seen in Supabase
+        self._cache = {}  # 'players' / 'games' -> (stamp, loaded_at, records)
+        self._versions = {'players': 0, 'games': 0}
+        self._lock = threading.Lock()
+
+    @property
+    def client(self):
+        return self.pool.client if self.pool is not None else self._client
+
+    @property
+    def connected(self):
+        return self.client is not None
+
+    def _failed(self, message):
+        self.on_error(message)
+        if self.pool is not None:
+            self.pool.check_soon()
+
+    def _cached(self, kind, fetch, key=None, empty=()):
+        """
+        Records of one kind from the cache, or from fetch() on a miss
+
+        key tells apart several entries of a kind (e.g. history pages); all
+        of them go stale together. Every call gets its own copies of the
+        records, so callers may edit them. A failed fetch (None) is not
+        cached and gives empty.
+        """
+        key = key or kind
+        if self.connected:
+            stamp = ('supabase', self._versions[kind])
+        else:
+            stamp = ('local', self._versions[kind], *map(file_stamp, self._local_files[kind]))
+
+        with self._lock:
+            entry = self._cache.get(key)
+            fresh = (
+                entry is not None and entry[0] == stamp
+                and (stamp[0] == 'local' or time.monotonic() - entry[1] < self.cache_ttl)
+            )
+            if fresh:
+                self.cache_hits += 1
+                records = entry[2]
+            else:
+                self.cache_misses += 1
+        if not fresh:
+            records = fetch()
+            if records is None:
+                return list(empty) if isinstance(empty, tuple) else empty
+            with self._lock:
+                # A write during the fetch bumped the version, so this entry is already stale
+                self._cache[key] = (stamp, time.monotonic(), records)
+        if isinstance(records, list):
+            return [copy.copy(record) for record in records]
+        return records
+
+    def invalidate(self, kind=None):
+        """Drop cached players or games (both without kind), e.g. after writing them elsewhere"""
+        with self._lock:
+            for name in ([kind] if kind else list(self._versions)):
+                self._versions[name] += 1
+                for key in [key for key in self._cache if key == name or key[0] == name]:
+                    del self._cache[key]
+
+    def load_players(self):
+        """Load players from Supabase or local JSON (cached)"""
+        return self._cached('players', self._fetch_players)
+
+    def _fetch_players(self):
+        if self.connected:
+            try:
+                response = self.client.table('players').select('*').execute()
+                # Convert UUID to string for consistency
+                players = response.data
+                for player in players:
+                    if 'id' in player:
+                        player['id'] = str(player['id'])
+                with self._lock:
+                    self._known_rows.update((p['id'], player_row(p)) for p in players if p.get('id'))
+                return players
+            except Exception as e:
+                self._failed(f"Error loading players from Supabase: {e}")
+                return None
+
+        if self.db is not None:
+            return self.db.load_players()
+        return load_json(self.players_file, [])
+
+    def save_players(self, players):
+        """
+        Save players to Supabase or local storage
+
+        In Supabase only new players and players whose columns changed since
+        they were last loaded or saved are written: new ones in one bulk
+        insert (which hands back their ids), changed ones in one upsert,
+        each chunked by UPSERT_CHUNK_SIZE rows. Returns what was written:
+        'rows', 'requests', 'seconds' and 'target' ('supabase' or 'local').
+        """
+        start = time.perf_counter()
+        self.invalidate('players')
+        if self.connected:
+            try:
+                client = self.client
+                with self._lock:
+                    changed = [
+                        player for player in players
+                        if player.get('id') and self._known_rows.get(player['id']) != player_row(player)
+                    ]
+                new = [player for player in players if not player.get('id')]
+                requests = 0
+
+                for chunk in chunks(changed, UPSERT_CHUNK_SIZE):
+                    client.table('players').upsert([{'id': p['id'], **player_row(p)} for p in chunk]).execute()
+                    requests += 1
+                    with self._lock:
+                        self._known_rows.update((p['id'], player_row(p)) for p in chunk)
+
+                for chunk in chunks(new, UPSERT_CHUNK_SIZE):
+                    # Rows come back in insert order, with their new ids
+                    result = client.table('players').insert([player_row(p) for p in chunk]).execute()
+                    requests += 1
+                    for player, row in zip(chunk, result.data or []):
+                        player['id'] = str(row['id'])
+                        with self._lock:
+                            self._known_rows[player['id']] = player_row(player)
+
+                return self._saved('supabase', len(changed) + len(new), requests, start)
+            except Exception as e:
+                self._failed(f"Error saving players to Supabase: {e}")
+                # Fall through to local save
+
+        if self.db is not None:
+            rows = self.db.save_players(players)
+        else:
+            save_json(self.players_file, players)
+            rows = len(players)
+        self.invalidate('players')
+        return self._saved('local', rows, 0, start)
+
+    @staticmethod
+    def _saved(target, rows, requests, start):
+        return {'target': target, 'rows': rows, 'requests': requests, 'seconds': time.perf_counter() - start}
+
+    def load_games(self):
+        """Load game history (newest first) from Supabase or local storage (cached)"""
+        return self._cached('games', self._fetch_games)
+
+    def _fetch_games(self):
+        if self.connected:
+            try:
+                response = self.client.table('games').select('*').order('created_at', desc=True).execute()
+                # Convert to the app's format and handle UUIDs
+                return [
+                    {
+                        'id': str(game['id']),
+                        'created_at': game['created_at'],
+                        'num_teams': game['num_teams'],
+                        'num_players': game['total_players'],  # Map total_players to num_players
+                        'teams': game['teams']
+                    }
+                    for game in response.data
+                ]
+            except Exception as e:
+                self._failed(f"Error loading games from Supabase: {e}")
+                return None
+
+        return self.local_games.load()
+
+    def count_games(self):
+        """Number of games in the history (cached)"""
+        def fetch():
+            if self.connected:
+                try:
+                    response = self.client.table('games').select('id', count='exact').limit(1).execute()
+                    return response.count
+                except Exception as e:
+                    self._failed(f"Error counting games in Supabase: {e}")
+                    return None
+            return self.local_games.count()
+
+        return self._cached('games', fetch, key=('games', 'count'), empty=0)
+
+    def load_game_page(self, page, page_size=HISTORY_PAGE_SIZE):
+        """
+        One page of the history (newest first, page 0 is the latest), as summaries
+
+        A summary has id, created_at, num_teams and num_players but not the
+        teams; load_game_teams fetches those for one game. Supabase sends
+        only the summary columns of the page's rows.
+        """
+        start = page * page_size
+
+        def fetch():
+            if self.connected:
+                try:
+                    response = (
+                        self.client.table('games').select(GAME_SUMMARY_COLUMNS)
+                        .order('created_at', desc=True).range(start, start + page_size - 1).execute()
+                    )
+                    return [
+                        {
+                            'id': str(game['id']),
+                            'created_at': game['created_at'],
+                            'num_teams': game['num_teams'],
+                            'num_players': game['total_players']
+                        }
+                        for game in response.data
+                    ]
+                except Exception as e:
+                    self._failed(f"Error loading games from Supabase: {e}")
+                    return None
+            return self.local_games.summaries(start, page_size)
+
+        return self._cached('games', fetch, key=('games', 'page', page, page_size))
+
+    def load_game_teams(self, game_id):
+        """The teams of one game (cached), or [] if it is not found"""
+        def fetch():
+            if self.connected:
+                try:
+                    response = self.client.table('games').select('teams').eq('id', game_id).limit(1).execute()
+                    return response.data[0]['teams'] if response.data else []
+                except Exception as e:
+                    self._failed(f"Error loading game from Supabase: {e}")
+                    return None
+            game = self.local_games.get(game_id)
+            return game['teams'] if game else []
+
+        return self._cached('games', fetch, key=('games', 'teams', str(game_id)))
+
+    def save_game(self, game_data):
+        """Save a game to history"""
+        self.invalidate('games')
+        if self.connected:
+            try:
+                # Format data to match Supabase schema
+                supabase_game = {
+                    'name': game_data.get('name', f"Game {datetime.now().strftime('%Y-%m-%d %H:%M')}"),
+                    'num_teams': game_data['num_teams'],
+                    'total_players': game_data['num_players'],
+                    'teams': game_data['teams']
+                }
+                self.client.table('games').insert(supabase_game).execute()
+                return
+            except Exception as e:
+                self._failed(f"Error saving game to Supabase: {e}")
+                # Fall through to local save
+
+        self.local_games.append(game_data)
+        self.invalidate('games')
+
+    def delete_player(self, player_id):
+        """Delete a player from Supabase (local rosters are rewritten by save_players)"""
+        self.invalidate('players')
+        if self.connected:
+            try:
+                self.client.table('players').delete().eq('id', player_id).execute()
+                with self._lock:
+                    self._known_rows.pop(player_id, None)
+                return True
+            except Exception as e:
+                self._failed(f"Error deleting player from Supabase: {e}")
+                return False
+        return True
+
+
+def chunks(items, size):
+    """Consecutive slices of at most size items"""
+    return [items[start:start + size] for start in range(0, len(items), size)]
+
+
+def read_roster_csv(path):
+    """Read players from a CSV with the same columns as the app's export"""
+    players = []
+    with open(path, newline='') as f:
+        for row in csv.DictReader(f):
+            player = {'name': row['name'].strip(), 'position': row.get('position') or 'Midfielder'}
+            for column in ROSTER_COLUMNS:
+                if row.get(column) not in (None, ''):
+                    player[column] = int(float(row[column]))
+            players.append(player)
+    return players
+
+
+def read_roster(path):
+    """Players from a roster CSV or a players JSON file (as saved by the apps)"""
+    if path.endswith('.json'):
+        return load_json(path, [])
+    return read_roster_csv(path)
+
+
+def teams_document(teams, stats=None):
+    """Lineup as the JSON document the command-line tools write"""
+    return {
+        'teams': [
+            {'team_number': idx + 1, 'players': [p['name'] for p in team]}
+            for idx, team in enumerate(teams)
+        ],
+        'stats': stats
+    }
+
+
+def write_teams(path, teams, stats=None):
+    """Write a lineup to a .csv (team, name, position rows) or .json file"""
+    if path.endswith('.csv'):
+        with open(path, 'w', newline='') as f:
+            writer = csv.writer(f)
+            writer.writerow(['team', 'name', 'position'])
+            for idx, team in enumerate(teams):
+                for player in team:
+                    writer.writerow([idx + 1, player['name'], player.get('position', '')])
+    else:
+        with open(path, 'w') as f:
+            json.dump(teams_document(teams, stats), f, indent=2)
@@ -1,54 +1,44 @@
 import streamlit as st
-import json
 from datetime import datetime
-import random
-from ortools.sat.python import cp_model
-import pandas as pd
+from balancing import assignment_from_teams, generate_lineup_pool, read_solver_settings, scaled_player_scores
+from jobs import CANCELLED, DONE, FAILED, QUEUED
+from job_ui import current_job, forget_job, fragment, get_job_manager, render_job_progress, start_prewarm
+from local_db import LocalDB
+from storage import (
+    HISTORY_PAGE_SIZE, LOCAL_DB_FILE, LOCAL_GAMES_FILE, LOCAL_PLAYERS_FILE, Storage, SupabasePool, supabase_credentials
+)
 from io import StringIO
 import os
+import uuid
 
 # Supabase setup (if using cloud version)
-# Try Streamlit secrets first (for Streamlit Cloud), then fall back to environment variables
-# Support both formats: with [supabase] section and without
-try:
-    # Try with [supabase] section first
-    if "supabase" in st.secrets:
-        SUPABASE_URL = st.secrets["supabase"].get("SUPABASE_URL", "")
-        SUPABASE_KEY = st.secrets["supabase"].get("SUPABASE_KEY", "")
-    else:
-        # Try without section (root level)
-        SUPABASE_URL = st.secrets.get("SUPABASE_URL", "")
-        SUPABASE_KEY = st.secrets.get("SUPABASE_KEY", "")
-    
-    # Fall back to environment variables if not in secrets
-    if not SUPABASE_URL:
-        SUPABASE_URL = os.getenv("SUPABASE_URL", "")
-    if not SUPABASE_KEY:
-        SUPABASE_KEY = os.getenv("SUPABASE_KEY", "")
-except:
-    SUPABASE_URL = os.getenv("SUPABASE_URL", "")
-    SUPABASE_KEY = os.getenv("SUPABASE_KEY", "")
+# Streamlit secrets first (with or without a [supabase] section), then environment variables
+SUPABASE_URL, SUPABASE_KEY = supabase_credentials(st.secrets)
 
-USE_SUPABASE = bool(SUPABASE_URL and SUPABASE_KEY)
+@st.cache_resource
+def get_supabase_pool(url, key):
+    """Supabase client shared by every session, health-checked in the background"""
+    return SupabasePool(url, key).start()
 
-if USE_SUPABASE:
-    try:
-        from supabase import create_client
-        supabase = create_client(SUPABASE_URL, SUPABASE_KEY)
-        # Test connection
-        supabase.table('players').select("count", count='exact').limit(1).execute()
-        st.session_state.supabase_connected = True
-    except Exception as e:
-        st.session_state.supabase_connected = False
-        USE_SUPABASE = False
-        print(f"Supabase connection failed: {e}")
-else:
-    st.session_state.supabase_connected = False
+# Reruns reuse the process-wide client; no connection or test query per click
+supabase_pool = get_supabase_pool(SUPABASE_URL, SUPABASE_KEY) if SUPABASE_URL and SUPABASE_KEY else None
+USE_SUPABASE = supabase_pool is not None and supabase_pool.client is not None
+st.session_state.supabase_connected = USE_SUPABASE
 
 # Constants
 POSITIONS = ["Forward", "Midfielder", "Defender", "Goalkeeper"]
-LOCAL_PLAYERS_FILE = "players.json"
-LOCAL_GAMES_FILE = "games.json"
+# Balancing results kept across sessions and restarts (set BALANCE_CACHE_FILE= to keep them in memory only)
+RESULT_CACHE_FILE = os.getenv("BALANCE_CACHE_FILE", "balance_cache.json") or None
+
+# Solver settings (CP-SAT parallel search)
+# Same lookup order as the Supabase credentials: [solver] secrets section, then environment variables
+def load_solver_settings():
+    """Load solver settings from Streamlit secrets or environment variables"""
+    try:
+        section = st.secrets["solver"] if "solver" in st.secrets else {}
+    except:
+        section = {}
+    return read_solver_settings(section)
 
 # Page config MUST be first Streamlit command
 st.set_page_config(
@@ -430,212 +420,123 @@ st.markdown("""
 </style>
 """, unsafe_allow_html=True)
 
-# Database functions
-def load_players():
-    """Load players from Supabase or local JSON"""
-    if USE_SUPABASE and st.session_state.get('supabase_connected', False):
-        try:
-            response = supabase.table('players').select('*').execute()
-            # Convert UUID to string for consistency
-            players = response.data
-            for player in players:
-                if 'id' in player:
-                    player['id'] = str(player['id'])
-            return players
-        except Exception as e:
-            st.error(f"Error loading players from Supabase: {e}")
-            return []
-    
-    # Fallback to local
-    if os.path.exists(LOCAL_PLAYERS_FILE):
-        with open(LOCAL_PLAYERS_FILE, 'r') as f:
-            return json.load(f)
-    return []
+# Database functions (storage.py): Supabase when connected, local SQLite otherwise
+@st.cache_resource
+def get_storage(url, key):
+    """Player and game store shared by every session (it remembers the rows Supabase holds)"""
+    pool = get_supabase_pool(url, key) if url and key else None
+    return Storage(
+        None, LOCAL_PLAYERS_FILE, LOCAL_GAMES_FILE, on_error=st.error, pool=pool, db=LocalDB(LOCAL_DB_FILE)
+    )
+
+storage = get_storage(SUPABASE_URL, SUPABASE_KEY)
+load_players = storage.load_players
+count_games = storage.count_games
+load_game_page = storage.load_game_page
+load_game_teams = storage.load_game_teams
 
 def save_players(players):
-    """Save players to Supabase or local JSON"""
-    if USE_SUPABASE and st.session_state.get('supabase_connected', False):
-        try:
-            # For each player, either insert or update
-            for player in players:
-                player_data = {
-                    'name': player['name'],
-                    'position': player.get('position', 'Midfielder'),
-                    'running_ability': player.get('running_ability', 5),
-                    'goal_scoring': player.get('goal_scoring', 5),
-                    'age': player.get('age', 25),
-                    'height': player.get('height', 175),
-                    'overall_skill': player.get('overall_skill', 5)
-                }
-                
-                if 'id' in player and player['id']:
-                    # Update existing player
-                    supabase.table('players').update(player_data).eq('id', player['id']).execute()
-                else:
-                    # Insert new player and get the ID back
-                    result = supabase.table('players').insert(player_data).execute()
-                    if result.data:
-                        player['id'] = str(result.data[0]['id'])
-            return
-        except Exception as e:
-            st.error(f"Error saving players to Supabase: {e}")
-            # Fall through to local save
-    
-    # Fallback to local
-    with open(LOCAL_PLAYERS_FILE, 'w') as f:
-        json.dump(players, f, indent=2)
+    """Save the players that changed; the rows written and the time taken show in the sidebar"""
+    st.session_state.last_save = storage.save_players(players)
 
-def load_games():
-    """Load game history from Supabase or local JSON"""
-    if USE_SUPABASE and st.session_state.get('supabase_connected', False):
-        try:
-            response = supabase.table('games').select('*').order('created_at', desc=True).execute()
-            # Convert to format expected by the app and handle UUIDs
-            games = []
-            for game in response.data:
-                games.append({
-                    'id': str(game['id']),
-                    'created_at': game['created_at'],
-                    'num_teams': game['num_teams'],
-                    'num_players': game['total_players'],  # Map total_players to num_players
-                    'teams': game['teams']
-                })
-            return games
-        except Exception as e:
-            st.error(f"Error loading games from Supabase: {e}")
-            return []
-    
-    # Fallback to local
-    if os.path.exists(LOCAL_GAMES_FILE):
-        with open(LOCAL_GAMES_FILE, 'r') as f:
-            return json.load(f)
-    return []
+save_game = storage.save_game
+delete_player = storage.delete_player
 
-def save_game(game_data):
-    """Save a game to history"""
-    if USE_SUPABASE and st.session_state.get('supabase_connected', False):
-        try:
-            # Format data to match Supabase schema
-            supabase_game = {
-                'name': game_data.get('name', f"Game {datetime.now().strftime('%Y-%m-%d %H:%M')}"),
-                'num_teams': game_data['num_teams'],
-                'total_players': game_data['num_players'],
-                'teams': game_data['teams']
-            }
-            supabase.table('games').insert(supabase_game).execute()
-            return
-        except Exception as e:
-            st.error(f"Error saving game to Supabase: {e}")
-            # Fall through to local save
-    
-    # Fallback to local
-    games = load_games()
-    games.insert(0, game_data)
-    with open(LOCAL_GAMES_FILE, 'w') as f:
-        json.dump(games, f, indent=2)
+# Result cache shared by every session of this server process
+@st.cache_resource
+def get_result_cache():
+    """Balancing results memoized by a fingerprint of the request"""
+    from result_cache import ResultCache
 
-def delete_player(player_id):
-    """Delete a player from Supabase or local JSON"""
-    if USE_SUPABASE and st.session_state.get('supabase_connected', False):
-        try:
-            supabase.table('players').delete().eq('id', player_id).execute()
-            return True
-        except Exception as e:
-            st.error(f"Error deleting player from Supabase: {e}")
-            return False
-    return True  # For local, handled by save_players
+    return ResultCache(RESULT_CACHE_FILE)
 
-# Team generation algorithm
-def generate_balanced_teams(players, num_teams):
-    """Generate balanced teams using OR-Tools optimization"""
-    from ortools.sat.python import cp_model
-    
-    n_players = len(players)
-    
-    if n_players < num_teams:
-        return None
-    
-    # Create the model
-    model = cp_model.CpModel()
-    
-    # Decision variables: player i assigned to team j
-    assignments = {}
-    for i in range(n_players):
-        for j in range(num_teams):
-            assignments[(i, j)] = model.NewBoolVar(f'player_{i}_team_{j}')
-    
-    # Constraint: Each player assigned to exactly one team
-    for i in range(n_players):
-        model.Add(sum(assignments[(i, j)] for j in range(num_teams)) == 1)
-    
-    # Constraint: Team sizes should be as equal as possible
-    min_size = n_players // num_teams
-    max_size = min_size + (1 if n_players % num_teams > 0 else 0)
-    
-    for j in range(num_teams):
-        team_size = sum(assignments[(i, j)] for i in range(n_players))
-        model.Add(team_size >= min_size)
-        model.Add(team_size <= max_size)
-    
-    # Calculate player scores (combination of all stats)
-    player_scores = []
-    for player in players:
-        score = (
-            player.get('running_ability', 5) +
-            player.get('goal_scoring', 5) +
-            player.get('overall_skill', 5)
-        )
-        player_scores.append(score)
-    
-    # Scale scores to integers (OR-Tools works with integers)
-    scaled_scores = [int(score * 100) for score in player_scores]
-    
-    # Calculate team totals
-    team_totals = []
-    for j in range(num_teams):
-        team_total = sum(assignments[(i, j)] * scaled_scores[i] for i in range(n_players))
-        team_totals.append(team_total)
-    
-    # Minimize the difference between max and min team totals
-    max_total = model.NewIntVar(0, sum(scaled_scores), 'max_total')
-    min_total = model.NewIntVar(0, sum(scaled_scores), 'min_total')
-    
-    for total in team_totals:
-        model.Add(max_total >= total)
-        model.Add(min_total <= total)
-    
-    # Objective: minimize the range (max - min)
-    model.Minimize(max_total - min_total)
-    
-    # Solve
-    solver = cp_model.CpSolver()
-    solver.parameters.max_time_in_seconds = 10.0  # 10 second timeout
-    status = solver.Solve(model)
-    
-    if status == cp_model.OPTIMAL or status == cp_model.FEASIBLE:
-        # Extract solution
-        teams = [[] for _ in range(num_teams)]
-        for i in range(n_players):
-            for j in range(num_teams):
-                if solver.Value(assignments[(i, j)]) == 1:
-                    teams[j].append(players[i])
-        return teams
+# Lineup pool helpers
+def lineup_pool_key(selected_players, num_teams):
+    """Identifies the selection (and the ratings) a cached lineup pool was built for"""
+    scores = scaled_player_scores(selected_players)
+    return (tuple(zip((p['name'] for p in selected_players), scores)), num_teams)
+
+def lineup_signature(teams):
+    """Lineup identity that ignores team order and player order"""
+    return frozenset(frozenset(p['name'] for p in team) for team in teams)
+
+def submit_pool_job(selected_players, num_teams, hint=None):
+    """Collect a fresh lineup pool (new seed) in the background, through the shared solve queue"""
+    st.session_state.lineup_pool_round += 1
+    settings = dict(st.session_state.solver_settings)
+    settings['random_seed'] += st.session_state.lineup_pool_round
+    settings['num_workers'] = get_job_manager().solver_workers(settings['num_workers'])
+    job = get_job_manager().submit(
+        lambda live: generate_lineup_pool(selected_players, num_teams, settings, hint=hint, live=live),
+        label=f"Different lineups for {len(selected_players)} players",
+        session=st.session_state.session_key
+    )
+    st.session_state.pool_job = job.id
+    st.session_state.pool_job_key = lineup_pool_key(selected_players, num_teams)
+
+def forget_pool_job(cancel=False):
+    """Detach the session from its pool job (cancelling it if asked)"""
+    job = get_job_manager().get(st.session_state.pool_job) if st.session_state.pool_job else None
+    if cancel and job is not None:
+        job.cancel(st.session_state.session_key)
+    st.session_state.pool_job = None
+    st.session_state.pool_job_key = None
+    st.session_state.regenerate_pending = False
+
+def show_next_lineup():
+    """Replace the teams on screen with the next pooled lineup; False if the pool is empty"""
+    if not st.session_state.lineup_pool:
+        return False
+    teams, lineup_range = st.session_state.lineup_pool.pop(0)
+    st.session_state.generated_teams = teams
+    # The caption describes the pool job's solve only once one of its lineups is on screen
+    if st.session_state.lineup_pool_stats:
+        st.session_state.last_solve_stats = dict(st.session_state.lineup_pool_stats)
+        if lineup_range is not None:
+            st.session_state.last_solve_stats['range'] = lineup_range
+    st.session_state.last_generation_timestamp = datetime.now()
+    return True
+
+@fragment(run_every=0.5)
+def render_pool_progress(job_id):
+    """Progress of the pool job a Regenerate click waits for, with a cancel button"""
+    job = get_job_manager().get(job_id)
+    if job is None or job.done:
+        st.rerun()  # the full page collects the pool
+    if job.status == QUEUED:
+        st.caption(f"⏳ Regenerating: queued, position {job.queue_position()} • waited {job.wait_time():.1f}s")
     else:
-        # Fallback to simple distribution if optimization fails
-        teams = [[] for _ in range(num_teams)]
-        shuffled = players.copy()
-        random.shuffle(shuffled)
-        for i, player in enumerate(shuffled):
-            teams[i % num_teams].append(player)
-        return teams
+        st.caption(f"🔄 Regenerating: collecting different balanced lineups... {job.elapsed():.1f}s")
+    if st.button("✖️ Cancel", key="cancel_pool_job", use_container_width=True):
+        forget_pool_job(cancel=True)
+        st.rerun()
 
 # Initialize session state
 if 'page' not in st.session_state:
     st.session_state.page = 'home'
+if 'history_page' not in st.session_state:
+    st.session_state.history_page = 0
 if 'generated_teams' not in st.session_state:
     st.session_state.generated_teams = None
 if 'last_generation_timestamp' not in st.session_state:
     st.session_state.last_generation_timestamp = None
+if 'solver_settings' not in st.session_state:
+    st.session_state.solver_settings = load_solver_settings()
+if 'last_solve_stats' not in st.session_state:
+    st.session_state.last_solve_stats = None
+if 'solve_job' not in st.session_state:
+    st.session_state.solve_job = None
+    # Identifies this session in the server-wide fair solve queue
+    st.session_state.session_key = uuid.uuid4().hex
+if 'lineup_pool' not in st.session_state:
+    st.session_state.lineup_pool = []
+    st.session_state.lineup_pool_key = None
+    st.session_state.lineup_pool_stats = None
+    st.session_state.lineup_pool_round = 0
+    # Background job collecting the next pool, and whether a Regenerate click waits for it
+    st.session_state.pool_job = None
+    st.session_state.pool_job_key = None
+    st.session_state.regenerate_pending = False
 
 # Sidebar navigation
 with st.sidebar:
@@ -664,12 +565,22 @@ with st.sidebar:
         st.success("☁️ Cloud Connected")
         # Debug info
         players = load_players()
-        games = load_games()
-        st.caption(f"📊 {len(players)} players, {len(games)} games")
+        st.caption(f"📊 {len(players)} players, {count_games()} games")
     else:
         st.info("💾 Using Local Storage")
-        if USE_SUPABASE:
-            st.caption("⚠️ Supabase configured but not connected")
+        if supabase_pool is not None:
+            st.caption(
+                f"⚠️ Supabase configured but not connected, retrying in the background "
+                f"(every {supabase_pool.next_check_in():.0f}s)"
+            )
+    last_save = st.session_state.get('last_save')
+    if last_save:
+        st.caption(
+            f"💾 Last save: {last_save['rows']} player(s) written to {last_save['target']} storage "
+            f"in {last_save['requests']} request(s), {last_save['seconds'] * 1000:.0f}ms"
+        )
+    if storage.cache_hits + storage.cache_misses:
+        st.caption(f"🗂️ Roster cache: {storage.cache_hits} hit(s), {storage.cache_misses} load(s)")
     
     st.markdown("---")
     st.markdown("**Team Balance Pro**")
@@ -718,14 +629,12 @@ if st.session_state.page == 'home':
                 st.info("Both credentials found but connection failed. Checking...")
                 
                 if st.button("🔄 Test Connection Now"):
-                    try:
-                        from supabase import create_client
-                        test_client = create_client(SUPABASE_URL, SUPABASE_KEY)
-                        result = test_client.table('players').select('*').limit(1).execute()
-                        st.success(f"✅ Connection works! Found {len(result.data)} players")
-                        st.info("Connection is working. Click 'Reboot app' in Streamlit settings to reconnect.")
-                    except Exception as e:
-                        st.error(f"❌ Connection failed: {str(e)}")
+                    # Checks the shared client, which every session uses again as soon as it answers
+                    if supabase_pool.check():
+                        st.success("✅ Connection works! Reconnecting...")
+                        st.rerun()
+                    else:
+                        st.error(f"❌ Connection failed: {supabase_pool.last_error}")
                         st.write("**Common fixes:**")
                         st.write("- Make sure tables are created in Supabase")
                         st.write("- Check RLS policies allow access")
@@ -739,7 +648,6 @@ if st.session_state.page == 'home':
     
     # Stats Grid
     players = load_players()
-    games = load_games()
     
     col1, col2, col3, col4 = st.columns(4)
     
@@ -754,7 +662,7 @@ if st.session_state.page == 'home':
     with col2:
         st.markdown(f"""
         <div class="stat-card">
-            <div class="stat-value">{len(games)}</div>
+            <div class="stat-value">{count_games()}</div>
             <div class="stat-label">Games Played</div>
         </div>
         """, unsafe_allow_html=True)
@@ -916,6 +824,7 @@ elif st.session_state.page == 'players':
         # Export
         st.subheader("📤 Export Players")
         if players:
+            import pandas as pd
             df = pd.DataFrame(players)
             csv = df.to_csv(index=False)
             st.download_button(
@@ -936,6 +845,7 @@ elif st.session_state.page == 'players':
         
         if uploaded_file:
             try:
+                import pandas as pd
                 df = pd.read_csv(uploaded_file)
                 
                 st.write("Preview:")
@@ -974,6 +884,10 @@ elif st.session_state.page == 'players':
         st.markdown('</div>', unsafe_allow_html=True)
 
 elif st.session_state.page == 'game':
+    # Solver modules load on the first visit to this page (usually pre-warmed by then)
+    from backends import BACKENDS, balance, request_fingerprint
+    from features import CORE_SCORE_WEIGHTS, teams_metrics
+    
     st.markdown('<div class="card">', unsafe_allow_html=True)
     st.markdown('<h1>🎯 Create Balanced Teams</h1>', unsafe_allow_html=True)
     st.markdown('<p style="font-size: 1.1rem; color: #718096;">Select players and generate perfectly balanced teams</p>', unsafe_allow_html=True)
@@ -1052,38 +966,164 @@ elif st.session_state.page == 'game':
             with col3:
                 st.info(f"~{selected_count // num_teams} per team")
             
+            with st.expander("⚙️ Solver Settings", expanded=False):
+                solver_settings = st.session_state.solver_settings
+                s1, s2, s3 = st.columns(3)
+                with s1:
+                    solver_settings['num_workers'] = st.number_input(
+                        "Search workers",
+                        min_value=1,
+                        max_value=64,
+                        value=min(64, solver_settings['num_workers']),
+                        step=1,
+                        help="Parallel CP-SAT workers (defaults to the number of CPU cores)"
+                    )
+                with s2:
+                    solver_settings['random_seed'] = st.number_input(
+                        "Random seed",
+                        min_value=0,
+                        value=solver_settings['random_seed'],
+                        step=1
+                    )
+                with s3:
+                    solver_settings['time_limit'] = st.number_input(
+                        "Time budget (s)",
+                        min_value=0.5,
+                        max_value=60.0,
+                        value=float(solver_settings['time_limit']),
+                        step=0.5
+                    )
+                solver_settings['gap_absolute'] = st.number_input(
+                    "Good enough range",
+                    min_value=0.0,
+                    max_value=10.0,
+                    value=float(solver_settings['gap_absolute']),
+                    step=0.5,
+                    help="Stop as soon as the teams are within this many score points of the best possible range"
+                )
+                solver_settings['deterministic'] = st.checkbox(
+                    "Deterministic search (same seed, same teams)",
+                    value=solver_settings['deterministic']
+                )
+                engines = ['auto'] + list(BACKENDS)
+                solver_settings['backend'] = st.selectbox(
+                    "Engine",
+                    engines,
+                    index=engines.index(solver_settings['backend']) if solver_settings['backend'] in engines else 0,
+                    help="'auto' picks the fastest engine for the roster size and time budget"
+                )
+            
             col1, col2 = st.columns(2)
             
             with col1:
                 if st.button("⚡ Generate Teams", type="primary", use_container_width=True):
                     selected_players_list = [players[i] for i in sorted(st.session_state.selected_players)]
                     
-                    with st.spinner("🔄 Generating balanced teams..."):
-                        teams = generate_balanced_teams(selected_players_list, num_teams)
-                        
-                        if teams:
-                            st.session_state.generated_teams = teams
-                            st.session_state.last_generation_timestamp = datetime.now()
-                            st.success("✅ Teams generated successfully!")
-                            st.rerun()
-                        else:
-                            st.error("❌ Failed to generate teams. Try different settings.")
+                    # Start from the lineup on screen when it still fits the selection
+                    hint = assignment_from_teams(
+                        selected_players_list, st.session_state.generated_teams, num_teams
+                    )
+                    settings = dict(st.session_state.solver_settings)
+                    # Concurrent solves share the cores
+                    settings['num_workers'] = get_job_manager().solver_workers(settings['num_workers'])
+                    cache = get_result_cache()
+                    # Solve in the background; the page below shows each improving lineup.
+                    # Identical requests (a double click, another organiser) share one job.
+                    previous = current_job()
+                    job = get_job_manager().submit(
+                        lambda live: balance(
+                            selected_players_list, num_teams, settings=settings,
+                            hint=hint, cache=cache, live=live
+                        ),
+                        label=f"{len(selected_players_list)} players into {num_teams} teams",
+                        session=st.session_state.session_key,
+                        key=request_fingerprint(selected_players_list, num_teams, settings=settings)
+                    )
+                    if previous is not None and previous is not job:
+                        previous.cancel(st.session_state.session_key)
+                    st.session_state.solve_job = job.id
+                    st.query_params['job'] = job.id
+                    st.rerun()
             
             with col2:
                 if st.session_state.generated_teams:
-                    if st.button("🔄 Regenerate Different Teams", use_container_width=True):
-                        selected_players_list = [players[i] for i in sorted(st.session_state.selected_players)]
-                        
-                        with st.spinner("🔄 Regenerating..."):
-                            # Force new random seed
-                            random.seed(datetime.now().timestamp())
-                            teams = generate_balanced_teams(selected_players_list, num_teams)
-                            
-                            if teams:
-                                st.session_state.generated_teams = teams
-                                st.session_state.last_generation_timestamp = datetime.now()
-                                st.success("✅ New teams generated!")
+                    selected_players_list = [players[i] for i in sorted(st.session_state.selected_players)]
+                    pool_key = lineup_pool_key(selected_players_list, num_teams)
+                    
+                    # Pool job finished (or the selection changed under it): take its lineups
+                    pool_job = get_job_manager().get(st.session_state.pool_job) if st.session_state.pool_job else None
+                    if st.session_state.pool_job and (pool_job is None or st.session_state.pool_job_key != pool_key):
+                        forget_pool_job(cancel=True)
+                    elif pool_job is not None and pool_job.done:
+                        waiting = st.session_state.regenerate_pending
+                        forget_pool_job()
+                        if pool_job.status == DONE and pool_job.result[0]:
+                            lineups, solve_stats = pool_job.result
+                            current = lineup_signature(st.session_state.generated_teams)
+                            st.session_state.lineup_pool = [
+                                lineup for lineup in lineups if lineup_signature(lineup[0]) != current
+                            ]
+                            st.session_state.lineup_pool_key = pool_key
+                            st.session_state.lineup_pool_stats = solve_stats
+                        elif pool_job.status == FAILED:
+                            st.error(f"❌ Failed to regenerate teams: {pool_job.error}")
+                        if waiting:
+                            if show_next_lineup():
                                 st.rerun()
+                            elif pool_job.status == DONE:
+                                st.warning("No other lineup is as balanced. Try more players or a different team count.")
+                    
+                    pool_ready = st.session_state.lineup_pool_key == pool_key and st.session_state.lineup_pool
+                    
+                    if st.button(
+                        "🔄 Regenerate Different Teams", use_container_width=True,
+                        disabled=st.session_state.regenerate_pending
+                    ):
+                        if pool_ready:
+                            show_next_lineup()
+                            st.success("✅ New teams generated!")
+                            st.rerun()
+                        # No pool yet, used up or selection changed: collect a fresh one with a new seed,
+                        # warm-started from the teams on screen
+                        if st.session_state.pool_job is None:
+                            submit_pool_job(
+                                selected_players_list, num_teams,
+                                assignment_from_teams(selected_players_list, st.session_state.generated_teams, num_teams)
+                            )
+                        st.session_state.regenerate_pending = True
+                        st.rerun()
+                    
+                    if st.session_state.regenerate_pending and st.session_state.pool_job:
+                        render_pool_progress(st.session_state.pool_job)
+                    elif pool_ready:
+                        st.caption(f"🎲 {len(st.session_state.lineup_pool)} more balanced lineups ready")
+            
+            # Running solve job: stream improving lineups until it finishes, is accepted or cancelled
+            job = current_job()
+            if job is not None and not job.done:
+                render_job_progress(job.id, "✋ Use This Lineup", show_lineup=True)
+            elif job is not None:
+                forget_job()
+                teams, solve_stats = job.result if job.status not in (CANCELLED, FAILED) else (None, None)
+                if job.status == CANCELLED:
+                    st.info("Solve cancelled.")
+                elif teams:
+                    st.session_state.generated_teams = teams
+                    st.session_state.last_solve_stats = solve_stats
+                    st.session_state.last_generation_timestamp = datetime.now()
+                    # Generate goes through balance() (any engine, result cache), which keeps no
+                    # pool; the first Regenerate click collects one in a background job
+                    st.session_state.lineup_pool = []
+                    st.session_state.lineup_pool_key = None
+                    st.session_state.lineup_pool_stats = None
+                    st.session_state.lineup_pool_round = 0
+                    forget_pool_job(cancel=True)
+                    st.success("✅ Teams generated successfully!")
+                    st.rerun()
+                elif job.error is not None:
+                    st.error(f"❌ Failed to generate teams: {job.error}")
+                else:
+                    st.error("❌ Failed to generate teams. Try different settings.")
             
             st.markdown('</div>', unsafe_allow_html=True)
         
@@ -1094,13 +1134,28 @@ elif st.session_state.page == 'game':
             
             teams = st.session_state.generated_teams
             
+            solve_stats = st.session_state.last_solve_stats
+            if solve_stats:
+                st.caption(
+                    f"⏱️ {solve_stats['status'].title()} ({solve_stats['engine']}) in {solve_stats['wall_time']:.2f}s "
+                    f"of {solve_stats['time_limit']:g}s budget ({solve_stats['budget_used']:.0%}) • "
+                    f"{solve_stats['num_workers']} workers • seed {solve_stats['random_seed']}"
+                    + (f" • range {solve_stats['range']:g}" if solve_stats.get('range') is not None else "")
+                    + (f" (best possible {solve_stats['lower_bound']:g})" if solve_stats.get('lower_bound') is not None else "")
+                    + (f" • warm start: {solve_stats['warm_start']}" if solve_stats.get('warm_start') else "")
+                    + (" • cached result" if solve_stats.get('cached') else "")
+                    + (" • accepted early" if solve_stats.get('stopped_early') else "")
+                )
+            
+            # Team stats for every team in one batched pass
+            team_metrics = teams_metrics(teams, CORE_SCORE_WEIGHTS)
+            
             for idx, team in enumerate(teams):
                 team_num = idx + 1
                 
-                # Calculate team stats
-                avg_skill = sum(p.get('overall_skill', 5) for p in team) / len(team)
-                avg_running = sum(p.get('running_ability', 5) for p in team) / len(team)
-                avg_goals = sum(p.get('goal_scoring', 5) for p in team) / len(team)
+                avg_skill = team_metrics[idx]['avg_skill']
+                avg_running = team_metrics[idx]['avg_running']
+                avg_goals = team_metrics[idx]['avg_goals']
                 
                 st.markdown(f"""
                 <div class="team-card">
@@ -1156,7 +1211,7 @@ elif st.session_state.page == 'game':
                         {
                             'team_number': i + 1,
                             'players': [p['name'] for p in team],
-                            'avg_skill': sum(p.get('overall_skill', 5) for p in team) / len(team)
+                            'avg_skill': team_metrics[i]['avg_skill']
                         }
                         for i, team in enumerate(teams)
                     ]
@@ -1173,15 +1228,33 @@ elif st.session_state.page == 'history':
     st.markdown('<p style="font-size: 1.1rem; color: #718096;">Review all your past games and team compositions</p>', unsafe_allow_html=True)
     st.markdown('</div>', unsafe_allow_html=True)
     
-    games = load_games()
+    total_games = count_games()
     
-    if not games:
+    if not total_games:
         st.info("📭 No games played yet. Create your first game to see history here!")
         if st.button("🎯 Create New Game", type="primary"):
             st.session_state.page = 'game'
             st.rerun()
     else:
-        st.markdown(f"**Total Games: {len(games)}**")
+        # Only the summaries of one page load; a game's teams load when it is opened
+        num_pages = (total_games + HISTORY_PAGE_SIZE - 1) // HISTORY_PAGE_SIZE
+        page = min(st.session_state.history_page, num_pages - 1)
+        first = page * HISTORY_PAGE_SIZE
+        games = load_game_page(page)
+        
+        st.markdown(f"**Total Games: {total_games}**")
+        if num_pages > 1:
+            col1, col2, col3 = st.columns([1, 2, 1])
+            with col1:
+                if st.button("⬅️ Newer", disabled=page == 0, use_container_width=True):
+                    st.session_state.history_page = page - 1
+                    st.rerun()
+            with col2:
+                st.caption(f"Games {first + 1}–{first + len(games)} of {total_games} (page {page + 1} of {num_pages})")
+            with col3:
+                if st.button("Older ➡️", disabled=page >= num_pages - 1, use_container_width=True):
+                    st.session_state.history_page = page + 1
+                    st.rerun()
         
         for idx, game in enumerate(games):
             game_date = datetime.fromisoformat(game['created_at']).strftime("%B %d, %Y at %I:%M %p")
@@ -1189,15 +1262,15 @@ elif st.session_state.page == 'history':
             st.markdown(f"""
             <div class="history-card">
                 <div class="game-date">🗓️ {game_date}</div>
-                <div class="game-title">Game #{len(games) - idx}</div>
+                <div class="game-title">Game #{total_games - first - idx}</div>
                 <p style="color: #718096; margin: 0.5rem 0;">
                     {game['num_teams']} teams • {game['num_players']} players
                 </p>
             </div>
             """, unsafe_allow_html=True)
             
-            with st.expander("View Team Details"):
-                for idx, team in enumerate(game['teams']):
+            if st.toggle("View Team Details", key=f"history_teams_{game['id']}"):
+                for idx, team in enumerate(load_game_teams(game['id'])):
                     # Handle both old and new data formats
                     team_num = team.get('team_number', idx + 1)
                     avg_skill = team.get('avg_skill', 0)
@@ -1210,3 +1283,6 @@ elif st.session_state.page == 'history':
                     for player_name in players_list:
                         st.markdown(f"- ⚽ {player_name}")
                     st.markdown("---")
+
+# Page is out: load the solver modules while the user reads it
+start_prewarm()
@@ -0,0 +1,82 @@
+"""
+Balance a roster from the command line, without Streamlit.
+
+Reads a roster CSV (like example_players.csv) or the apps' players JSON,
+balances it with the same engines as the apps and writes the teams as JSON
+or CSV. Solver settings come from SOLVER_<NAME> environment variables, as
+for the apps, and the options below override them.
+
+Only the standard library is imported until the arguments are parsed, and
+OR-Tools only once CP-SAT actually has to run, so most rosters (which the
+exact partitioner settles) balance with no solver start-up at all.
+
+Usage:
+    python team_balance_cli.py example_players.csv --teams 2 [--engine auto] [--output teams.json]
+"""
+import argparse
+import json
+import sys
+
+from storage import read_roster, teams_document, write_teams
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Balance a roster into teams")
+    parser.add_argument('roster', help="roster CSV (name, position and stat columns) or players JSON")
+    parser.add_argument('--teams', type=int, default=2, help="number of teams")
+    parser.add_argument('--players', help="comma-separated names of the players taking part (default: everyone)")
+    parser.add_argument('--engine', help="solver backend (default 'auto', see backends.py)")
+    parser.add_argument('--time-limit', type=float, help="time budget in seconds")
+    parser.add_argument('--seed', type=int, help="random seed")
+    parser.add_argument('--cache', help="result cache file shared with the apps (e.g. balance_cache.json)")
+    parser.add_argument('--output', help="write teams to this .json or .csv file (default: JSON on stdout)")
+    args = parser.parse_args(argv)
+
+    players = read_roster(args.roster)
+    if args.players:
+        wanted = [name.strip() for name in args.players.split(',') if name.strip()]
+        by_name = {p['name']: p for p in players}
+        missing = [name for name in wanted if name not in by_name]
+        if missing:
+            parser.error(f"Unknown players: {', '.join(missing)}")
+        players = [by_name[name] for name in wanted]
+    if args.teams < 1 or args.teams > len(players):
+        parser.error(f"--teams must be between 1 and the number of players ({len(players)})")
+
+    from backends import BACKENDS, balance
+    from balancing import read_solver_settings
+
+    settings = read_solver_settings()
+    overrides = {'backend': args.engine, 'time_limit': args.time_limit, 'random_seed': args.seed}
+    settings.update({key: value for key, value in overrides.items() if value is not None})
+    if settings['backend'] != 'auto' and settings['backend'] not in BACKENDS:
+        parser.error(f"--engine must be 'auto' or one of: {', '.join(BACKENDS)}")
+
+    cache = None
+    if args.cache:
+        from result_cache import ResultCache
+        cache = ResultCache(args.cache)
+
+    try:
+        teams, stats = balance(players, args.teams, settings=settings, cache=cache)
+    except (ValueError, RuntimeError) as e:
+        print(f"Balancing failed: {e}", file=sys.stderr)
+        return 1
+
+    if args.output:
+        write_teams(args.output, teams, stats)
+    else:
+        json.dump(teams_document(teams, stats), sys.stdout, indent=2)
+        print()
+
+    print(
+        f"Balanced {len(players)} players into {args.teams} teams with {stats['backend']}: "
+        f"range {stats['range']:g}, {stats['status'].lower()} in {stats['wall_time'] * 1000:.0f}ms"
+        + (" (cached)" if stats.get('cached') else ""),
+        file=sys.stderr
+    )
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
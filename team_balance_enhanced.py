@@ -1,11 +1,12 @@
 import streamlit as st
-import pandas as pd
-import json
-import os
+import uuid
 from datetime import datetime
-from pulp import LpProblem, LpVariable, LpMinimize, lpSum, LpBinary, value, PULP_CBC_CMD
 import random
 from typing import Dict, List, Set, Tuple
+from balancing import DEFAULT_SOLVER_SETTINGS
+from jobs import CANCELLED, FAILED
+from job_ui import current_job, forget_job, get_job_manager, render_job_progress, start_prewarm
+from local_db import LocalDB
 
 # Page config
 st.set_page_config(
@@ -96,6 +97,8 @@ PLAYERS_FILE = "players_inventory.json"
 GAMES_FILE = "games_history.json"
 PARTNERSHIPS_FILE = "player_partnerships.json"
 CONFLICTS_FILE = "player_conflicts.json"
+DB_FILE = "team_balance_enhanced.db"
+RESULT_CACHE_FILE = "balance_cache.json"
 
 # Position options
 POSITIONS = ["Forward", "Midfielder", "Defender", "Goalkeeper"]
@@ -103,61 +106,52 @@ POSITIONS = ["Forward", "Midfielder", "Defender", "Goalkeeper"]
 # Color schemes for teams
 TEAM_COLORS = ["blue", "red", "green", "orange", "purple", "cyan"]
 
-def load_json(filename, default):
-    """Load JSON file or return default if not exists"""
-    if os.path.exists(filename):
-        with open(filename, 'r') as f:
-            return json.load(f)
-    return default
-
-def save_json(filename, data):
-    """Save data to JSON file"""
-    with open(filename, 'w') as f:
-        json.dump(data, f, indent=2)
+@st.cache_resource
+def get_local_db():
+    """SQLite database shared by every session; the JSON files above are migrated into it on first use"""
+    db = LocalDB(DB_FILE)
+    db.migrate(PLAYERS_FILE, GAMES_FILE, PARTNERSHIPS_FILE, CONFLICTS_FILE, games_newest_first=False)
+    return db
 
 def load_players():
     """Load players from inventory"""
-    return load_json(PLAYERS_FILE, [])
+    return get_local_db().load_players()
 
 def save_players(players):
-    """Save players to inventory"""
-    save_json(PLAYERS_FILE, players)
+    """Save players to inventory (only the changed rows are written)"""
+    get_local_db().save_players(players)
 
 def load_games():
-    """Load game history"""
-    return load_json(GAMES_FILE, [])
+    """Load game history (newest first)"""
+    return get_local_db().games.load()
+
+def count_games():
+    """Number of games in the history"""
+    return get_local_db().games.count()
 
 def save_game(game_data):
     """Save a game to history"""
-    games = load_games()
-    games.append(game_data)
-    save_json(GAMES_FILE, games)
+    get_local_db().games.append(game_data)
+
+def delete_game(game_id):
+    """Delete a game from history"""
+    get_local_db().games.delete(game_id)
 
 def load_partnerships():
     """Load player partnerships"""
-    return load_json(PARTNERSHIPS_FILE, {})
+    return get_local_db().load_relations('partnerships')
 
 def save_partnerships(partnerships):
     """Save player partnerships"""
-    save_json(PARTNERSHIPS_FILE, partnerships)
+    get_local_db().save_relations('partnerships', partnerships)
 
 def load_conflicts():
     """Load player conflicts"""
-    return load_json(CONFLICTS_FILE, {})
+    return get_local_db().load_relations('conflicts')
 
 def save_conflicts(conflicts):
     """Save player conflicts"""
-    save_json(CONFLICTS_FILE, conflicts)
-
-def calculate_player_score(player):
-    """Calculate overall score for a player (equal weights)"""
-    return (
-        player.get('running_ability', 5) +
-        player.get('goal_scoring', 5) +
-        player.get('age', 25) / 5 +  # Normalize age
-        player.get('height', 170) / 34 +  # Normalize height
-        player.get('overall_skill', 5)
-    )
+    get_local_db().save_relations('conflicts', conflicts)
 
 def get_position_value(position):
     """Map position to numeric value for role fit"""
@@ -169,169 +163,91 @@ def get_position_value(position):
     }
     return position_map.get(position, 2.5)
 
-def count_positions(team_players):
-    """Count positions in a team"""
-    positions = {"Forward": 0, "Midfielder": 0, "Defender": 0, "Goalkeeper": 0}
-    for player in team_players:
-        pos = player.get('position', 'Midfielder')
-        positions[pos] += 1
-    return positions
-
 def calculate_team_metrics(team_players):
     """Calculate comprehensive team metrics"""
-    if not team_players:
-        return {
-            'avg_running': 0,
-            'avg_goals': 0,
-            'avg_age': 0,
-            'avg_height': 0,
-            'avg_skill': 0,
-            'total_score': 0,
-            'position_dist': {"Forward": 0, "Midfielder": 0, "Defender": 0, "Goalkeeper": 0}
-        }
-    
-    positions = count_positions(team_players)
-    
-    return {
-        'avg_running': sum(p.get('running_ability', 5) for p in team_players) / len(team_players),
-        'avg_goals': sum(p.get('goal_scoring', 5) for p in team_players) / len(team_players),
-        'avg_age': sum(p.get('age', 25) for p in team_players) / len(team_players),
-        'avg_height': sum(p.get('height', 170) for p in team_players) / len(team_players),
-        'avg_skill': sum(p.get('overall_skill', 5) for p in team_players) / len(team_players),
-        'total_score': sum(calculate_player_score(p) for p in team_players),
-        'position_dist': positions
-    }
+    from features import teams_metrics
+
+    return teams_metrics([team_players])[0]
 
-def balance_teams_advanced(players, num_teams, partnerships, conflicts, locked_assignments):
+def balance_teams_advanced(players, num_teams, partnerships, conflicts, locked_assignments, cache=None, live=None,
+                           settings=None):
     """
-    Advanced team balancing with partnerships, conflicts, and position awareness
+    Advanced team balancing with partnerships, conflicts and locked players
+
+    The engine is picked per request (see backends.select_backend): CBC when
+    locks, partnerships or conflicts involve these players, otherwise the
+    exact partitioner / CP-SAT or the league LNS. No
+    Streamlit calls, so it can run as a background job.
+
+    Returns (teams, stats); stats['fallback_reason'] is set when the solver
+    failed and the swap search fallback produced the teams.
     """
+    from backends import balance
+    from features import feature_matrix, player_scores
+
+    # Player scores come from one feature matrix instead of per-player dict lookups
+    scores = player_scores(feature_matrix(players)).tolist()
     try:
-        prob = LpProblem("Team_Balancing", LpMinimize)
-        
-        # Decision variables
-        assignments = {}
-        for i, player in enumerate(players):
-            for t in range(num_teams):
-                assignments[(i, t)] = LpVariable(f"player_{i}_team_{t}", cat=LpBinary)
-        
-        # Each player assigned to exactly one team
-        for i in range(len(players)):
-            prob += lpSum([assignments[(i, t)] for t in range(num_teams)]) == 1
-        
-        # Lock players to specific teams
-        for player_name, team_idx in locked_assignments.items():
-            player_idx = next((i for i, p in enumerate(players) if p['name'] == player_name), None)
-            if player_idx is not None:
-                prob += assignments[(player_idx, team_idx)] == 1
-        
-        # Team size constraints
-        team_size = len(players) // num_teams
-        for t in range(num_teams):
-            prob += lpSum([assignments[(i, t)] for i in range(len(players))]) >= team_size
-            prob += lpSum([assignments[(i, t)] for i in range(len(players))]) <= team_size + 1
-        
-        # Calculate team scores
-        team_scores = {}
-        for t in range(num_teams):
-            team_score = lpSum([
-                assignments[(i, t)] * calculate_player_score(players[i])
-                for i in range(len(players))
-            ])
-            team_scores[t] = team_score
-        
-        # Position balance - each team should have similar position distribution
-        position_scores = {pos: {} for pos in POSITIONS}
-        for pos in POSITIONS:
-            for t in range(num_teams):
-                position_count = lpSum([
-                    assignments[(i, t)]
-                    for i in range(len(players))
-                    if players[i].get('position') == pos
-                ])
-                position_scores[pos][t] = position_count
-        
-        # Minimize variance in team scores
-        max_score = LpVariable("max_score")
-        min_score = LpVariable("min_score")
-        
-        for t in range(num_teams):
-            prob += team_scores[t] <= max_score
-            prob += team_scores[t] >= min_score
-        
-        prob += max_score - min_score  # Minimize difference
-        
-        # Add partnership bonuses (encourage partnerships to be on same team)
-        partnership_bonus = 0
-        for player1, partners in partnerships.items():
-            p1_idx = next((i for i, p in enumerate(players) if p['name'] == player1), None)
-            if p1_idx is not None:
-                for player2 in partners:
-                    p2_idx = next((i for i, p in enumerate(players) if p['name'] == player2), None)
-                    if p2_idx is not None and p1_idx < p2_idx:  # Avoid double counting
-                        for t in range(num_teams):
-                            # Penalty if partners are NOT together
-                            partnership_bonus += 10 * (2 - assignments[(p1_idx, t)] - assignments[(p2_idx, t)])
-        
-        prob += partnership_bonus
-        
-        # Add conflict penalties (separate conflicting players)
-        conflict_penalty = 0
-        for player1, conflicts_list in conflicts.items():
-            p1_idx = next((i for i, p in enumerate(players) if p['name'] == player1), None)
-            if p1_idx is not None:
-                for player2 in conflicts_list:
-                    p2_idx = next((i for i, p in enumerate(players) if p['name'] == player2), None)
-                    if p2_idx is not None and p1_idx < p2_idx:
-                        for t in range(num_teams):
-                            # Penalty if conflicts are together
-                            conflict_penalty += 20 * (assignments[(p1_idx, t)] + assignments[(p2_idx, t)] - 1)
-        
-        prob += conflict_penalty
-        
-        # Solve
-        prob.solve(PULP_CBC_CMD(msg=0))
-        
-        # Extract solution
-        teams = [[] for _ in range(num_teams)]
-        for i, player in enumerate(players):
-            for t in range(num_teams):
-                if value(assignments[(i, t)]) == 1:
-                    teams[t].append(player)
-                    break
-        
-        return teams
+        return balance(
+            players, num_teams, locked_assignments, partnerships, conflicts, settings=settings,
+            scores=scores, cache=cache, live=live
+        )
     
     except Exception as e:
-        st.error(f"Optimization failed: {e}")
-        # Fallback to greedy algorithm
-        return balance_teams_greedy(players, num_teams, locked_assignments)
-
-def balance_teams_greedy(players, num_teams, locked_assignments):
-    """Greedy fallback algorithm with position awareness"""
-    # Sort players by score
-    sorted_players = sorted(players, key=calculate_player_score, reverse=True)
-    teams = [[] for _ in range(num_teams)]
-    
-    # First, assign locked players
-    assigned_players = set()
-    for player_name, team_idx in locked_assignments.items():
-        player = next((p for p in sorted_players if p['name'] == player_name), None)
-        if player:
-            teams[team_idx].append(player)
-            assigned_players.add(player_name)
-    
-    # Remove assigned players from sorted list
-    sorted_players = [p for p in sorted_players if p['name'] not in assigned_players]
-    
-    # Distribute remaining players
-    for player in sorted_players:
-        # Find team with lowest total score
-        team_scores = [sum(calculate_player_score(p) for p in team) for team in teams]
-        min_team = team_scores.index(min(team_scores))
-        teams[min_team].append(player)
-    
-    return teams
+        # Fallback without a solver (partnerships and conflicts are ignored)
+        teams, stats = balance_teams_swap_search(players, num_teams, locked_assignments)
+        stats['fallback_reason'] = str(e)
+        return teams, stats
+
+@st.cache_resource
+def get_result_cache():
+    """Balancing results shared by every session and kept across restarts"""
+    from result_cache import ResultCache
+
+    return ResultCache(RESULT_CACHE_FILE)
+
+def balance_teams_swap_search(players, num_teams, locked_assignments):
+    """Solver-free fallback: greedy draft improved by swap search"""
+    from backends import balance
+    from features import feature_matrix, player_scores
+
+    scores = player_scores(feature_matrix(players)).tolist()
+    return balance(players, num_teams, locked_assignments, scores=scores, settings={'backend': 'swap search'})
+
+def submit_balance_job(players, num_teams, game_name):
+    """
+    Start balance_teams_advanced in the background and attach this session to it
+
+    Identical requests (a double click, another organiser) share one job.
+    """
+    from backends import request_fingerprint
+    from features import feature_matrix, player_scores
+
+    partnerships = load_partnerships()
+    conflicts = load_conflicts()
+    locked = dict(st.session_state.locked_players)
+    cache = get_result_cache()
+    # Concurrent solves share the cores
+    settings = {'num_workers': get_job_manager().solver_workers(DEFAULT_SOLVER_SETTINGS['num_workers'])}
+    key = request_fingerprint(
+        players, num_teams, locked, partnerships, conflicts, settings,
+        scores=player_scores(feature_matrix(players)).tolist()
+    )
+    previous = current_job()
+    job = get_job_manager().submit(
+        lambda live: balance_teams_advanced(
+            players, num_teams, partnerships, conflicts, locked, cache, live, settings
+        ),
+        label=f"{len(players)} players into {num_teams} teams",
+        session=st.session_state.session_key,
+        key=key
+    )
+    if previous is not None and previous is not job:
+        previous.cancel(st.session_state.session_key)
+    # A shared job may have been submitted by another session, so the game details stay here
+    st.session_state.pending_game = {'game_name': game_name, 'selected_players': players}
+    st.session_state.solve_job = job.id
+    st.query_params['job'] = job.id
 
 def render_team_card(team_name, team_players, team_idx, show_swap=False):
     """Render a beautiful team card with metrics"""
@@ -381,9 +297,13 @@ def render_team_card(team_name, team_players, team_idx, show_swap=False):
 
 def render_balance_comparison(teams):
     """Render side-by-side team comparison"""
+    import pandas as pd
+    from features import teams_metrics
+
     st.subheader("⚖️ Team Balance Comparison")
     
-    metrics_list = [calculate_team_metrics(team) for team in teams]
+    # One batched pass over every team instead of a metrics call per team
+    metrics_list = teams_metrics(teams)
     
     # Get max values for normalization
     max_score = max(m['total_score'] for m in metrics_list)
@@ -433,6 +353,12 @@ if 'swap_player' not in st.session_state:
     st.session_state.swap_player = None
 if 'swap_from_team' not in st.session_state:
     st.session_state.swap_from_team = None
+if 'solve_job' not in st.session_state:
+    st.session_state.solve_job = None
+if 'pending_game' not in st.session_state:
+    st.session_state.pending_game = None
+    # Identifies this session in the server-wide fair solve queue
+    st.session_state.session_key = uuid.uuid4().hex
 
 # Sidebar navigation
 with st.sidebar:
@@ -500,11 +426,10 @@ if st.session_state.page == 'home':
     
     # Quick stats
     players = load_players()
-    games = load_games()
     
     col1, col2, col3, col4 = st.columns(4)
     col1.metric("Total Players", len(players))
-    col2.metric("Games Played", len(games))
+    col2.metric("Games Played", count_games())
     
     if players:
         avg_skill = sum(p.get('overall_skill', 5) for p in players) / len(players)
@@ -613,6 +538,7 @@ elif st.session_state.page == 'players':
         with col1:
             st.write("**Export Current Players**")
             if players:
+                import pandas as pd
                 df = pd.DataFrame(players)
                 csv = df.to_csv(index=False)
                 st.download_button(
@@ -632,6 +558,7 @@ elif st.session_state.page == 'players':
             if uploaded_file:
                 if st.button("Import Players", use_container_width=True):
                     try:
+                        import pandas as pd
                         df = pd.read_csv(uploaded_file)
                         required_cols = ['name', 'position']
                         
@@ -779,7 +706,7 @@ elif st.session_state.page == 'game':
         col1, col2 = st.columns(2)
         
         with col1:
-            game_name = st.text_input("Game Name", f"Game {len(load_games()) + 1}")
+            game_name = st.text_input("Game Name", f"Game {count_games() + 1}")
             
             # Player selection
             st.write("**Select Players:**")
@@ -824,26 +751,32 @@ elif st.session_state.page == 'game':
         # Generate teams button
         if len(selected_players) >= num_teams * 2:
             if st.button("⚡ Generate Balanced Teams", type="primary", use_container_width=True):
-                with st.spinner("Balancing teams with AI optimization..."):
-                    partnerships = load_partnerships()
-                    conflicts = load_conflicts()
-                    
-                    teams = balance_teams_advanced(
-                        selected_players,
-                        num_teams,
-                        partnerships,
-                        conflicts,
-                        st.session_state.locked_players
-                    )
-                    
-                    st.session_state.generated_teams = teams
-                    st.session_state.game_name = game_name
-                    st.session_state.selected_players = selected_players
-                    st.success("✅ Teams generated successfully!")
-                    st.rerun()
+                submit_balance_job(selected_players, num_teams, game_name)
+                st.rerun()
         else:
             st.warning(f"⚠️ Select at least {num_teams * 2} players to create {num_teams} teams")
         
+        # Running solve job: poll it, or collect its result once it is done
+        job = current_job()
+        if job is not None and not job.done:
+            render_job_progress(job.id)
+        elif job is not None:
+            forget_job()
+            if job.status == CANCELLED:
+                st.info("Balancing cancelled.")
+            elif job.status == FAILED:
+                st.error(f"Optimization failed: {job.error}")
+            else:
+                teams, solve_stats = job.result
+                st.session_state.generated_teams = teams
+                pending = st.session_state.pending_game or {}
+                st.session_state.game_name = pending.get('game_name', st.session_state.get('game_name', ''))
+                st.session_state.selected_players = pending.get('selected_players', [p for team in teams for p in team])
+                if solve_stats.get('fallback_reason'):
+                    st.warning(f"Optimization failed ({solve_stats['fallback_reason']}), teams come from swap search")
+                else:
+                    st.success("✅ Teams generated successfully!")
+        
         # Display generated teams
         if st.session_state.generated_teams:
             st.markdown("---")
@@ -853,18 +786,12 @@ elif st.session_state.page == 'game':
             col1, col2, col3 = st.columns(3)
             
             if col1.button("🔄 Regenerate Teams", use_container_width=True):
-                with st.spinner("Regenerating..."):
-                    partnerships = load_partnerships()
-                    conflicts = load_conflicts()
-                    teams = balance_teams_advanced(
-                        st.session_state.selected_players,
-                        len(st.session_state.generated_teams),
-                        partnerships,
-                        conflicts,
-                        st.session_state.locked_players
-                    )
-                    st.session_state.generated_teams = teams
-                    st.rerun()
+                submit_balance_job(
+                    st.session_state.selected_players,
+                    len(st.session_state.generated_teams),
+                    st.session_state.get('game_name', game_name)
+                )
+                st.rerun()
             
             if col2.button("💾 Save Game", use_container_width=True):
                 game_data = {
@@ -962,6 +889,7 @@ elif st.session_state.page == 'game':
                             'Goals': player.get('goal_scoring', 5)
                         })
                 
+                import pandas as pd
                 df = pd.DataFrame(export_data)
                 csv = df.to_csv(index=False)
                 
@@ -984,8 +912,7 @@ elif st.session_state.page == 'history':
     else:
         st.write(f"**Total Games: {len(games)}**")
         
-        # Reverse to show newest first
-        for idx, game in enumerate(reversed(games)):
+        for idx, game in enumerate(games):
             with st.expander(f"🎮 {game['name']} - {game['date'][:10]}", expanded=(idx == 0)):
                 st.write(f"**Date:** {game['date'][:16]}")
                 st.write(f"**Teams:** {game['num_teams']}")
@@ -996,7 +923,9 @@ elif st.session_state.page == 'history':
                     st.markdown(f"**Team {team_idx + 1}:** {', '.join(p['name'] for p in team)}")
                 
                 if st.button(f"🗑️ Delete Game", key=f"delete_game_{idx}"):
-                    games.remove(game)
-                    save_json(GAMES_FILE, games)
+                    delete_game(game['id'])
                     st.success("Game deleted!")
                     st.rerun()
+
+# Page is out: load the solver modules while the user reads it
+start_prewarm()
@@ -0,0 +1,16 @@
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).resolve().parent.parent
+# Only the apps and their job UI helpers may import Streamlit; the CLI, season.py and benchmarks run without it
+STREAMLIT_MODULES = {'team_balance_apple', 'team_balance_enhanced', 'job_ui'}
+LIBRARY_MODULES = sorted(path.stem for path in ROOT.glob('*.py') if path.stem not in STREAMLIT_MODULES)
+
+
+@pytest.mark.parametrize('module', LIBRARY_MODULES)
+def test_library_module_does_not_import_streamlit(module):
+    code = f"import sys, {module}; sys.exit('streamlit' in sys.modules)"
+    assert subprocess.run([sys.executable, '-c', code], cwd=ROOT).returncode == 0
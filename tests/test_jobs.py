@@ -0,0 +1,117 @@
+import threading
+import time
+
+import pytest
+
+from jobs import CANCELLED, DONE, QUEUED, RUNNING, JobManager
+
+
+class Gate:
+    """Solves that block until released and record the order they started in"""
+
+    def __init__(self):
+        self.release = threading.Event()
+        self.started = []
+
+    def solve(self, name):
+        def run(job):
+            self.started.append(name)
+            job.publish([[name]], {'range': 1.0, 'bound': 0.0, 'wall_time': 0.0, 'engine': 'test'})
+            while not self.release.wait(0.01):
+                if job.stop_requested:
+                    break
+            return [[name]], {'status': 'OPTIMAL', 'range': 1.0}
+        return run
+
+
+def wait_until(condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "timed out"
+        time.sleep(0.01)
+
+
+def test_identical_requests_share_one_job():
+    manager, gate = JobManager(max_concurrent=2), Gate()
+    first = manager.submit(gate.solve('a'), session='A', key='same')
+    second = manager.submit(gate.solve('b'), session='B', key='same')
+
+    assert second is first
+    assert first.sessions == {'A', 'B'}
+    assert manager.metrics()['coalesced'] == 1
+
+    # One session leaving does not cancel the solve the other still waits for
+    first.cancel('A')
+    assert first.status == RUNNING
+    gate.release.set()
+    wait_until(lambda: first.done)
+    assert first.status == DONE
+    assert gate.started == ['a']
+
+
+def test_cancel_of_a_queued_job_never_starts_it():
+    manager, gate = JobManager(max_concurrent=1), Gate()
+    running = manager.submit(gate.solve('running'), session='A')
+    queued = manager.submit(gate.solve('queued'), session='A')
+    wait_until(lambda: gate.started)
+    assert queued.status == QUEUED
+
+    queued.cancel('A')
+    assert queued.status == CANCELLED and queued.done
+    gate.release.set()
+    wait_until(lambda: running.done)
+    assert gate.started == ['running']
+
+
+def test_cancel_stops_a_running_job():
+    manager, gate = JobManager(max_concurrent=1), Gate()
+    job = manager.submit(gate.solve('running'), session='A')
+    wait_until(lambda: gate.started)
+
+    job.cancel('A')
+    wait_until(lambda: job.done)
+    assert job.status == CANCELLED
+
+
+@pytest.mark.parametrize('policy,expected', [
+    ('fair', ['b1', 'a1', 'a2', 'a3']),
+    ('fifo', ['a1', 'a2', 'a3', 'b1']),
+])
+def test_queue_order(policy, expected):
+    manager, gate = JobManager(max_concurrent=1, policy=policy), Gate()
+    manager.submit(gate.solve('busy'), session='A')
+    wait_until(lambda: gate.started)
+    jobs = {name: manager.submit(gate.solve(name), session=name[0].upper()) for name in ('a1', 'a2', 'a3', 'b1')}
+
+    assert sorted(jobs, key=lambda name: jobs[name].queue_position()) == expected
+    gate.release.set()
+    wait_until(lambda: all(job.done for job in jobs.values()))
+    assert gate.started == ['busy'] + expected
+
+
+def test_accept_on_a_shared_job_leaves_it_running_for_the_others():
+    manager, gate = JobManager(max_concurrent=1), Gate()
+    job = manager.submit(gate.solve('shared'), session='A', key='same')
+    manager.submit(gate.solve('shared'), session='B', key='same')
+    wait_until(lambda: job.latest() is not None)
+
+    accepted = job.accept('A')
+
+    assert accepted is not job and accepted.status == DONE
+    assert manager.get(accepted.id) is accepted
+    assert accepted.result[0] == [['shared']] and accepted.result[1]['stopped_early']
+    assert not job.stop_requested and job.sessions == {'B'}
+    assert job.accept('B') is job and job.stop_requested
+    wait_until(lambda: job.done)
+
+
+def test_pure_python_engines_run_in_the_process_pool():
+    from partitioning import partition_balanced
+
+    scores = [512, 433, 871, 120, 655, 298, 744, 301]
+    manager = JobManager(max_concurrent=1)
+    job = manager.submit(lambda job: (job.run_python(partition_balanced, scores, 2, stoppable=False), None))
+    wait_until(lambda: job.done, timeout=60.0)
+
+    assert job.status == DONE
+    assert job.result[0]['range'] == partition_balanced(scores, 2)['range']
@@ -0,0 +1,83 @@
+import json
+
+from local_db import LocalDB
+from storage import GameLog
+
+
+def roster(*names):
+    return [{'name': name, 'position': 'Midfielder', 'running': 3} for name in names]
+
+
+def test_roster_saves_write_only_the_players_that_changed(tmp_path):
+    db = LocalDB(str(tmp_path / 'team.db'))
+    players = roster('Ana', 'Ben', 'Cy')
+
+    assert db.save_players(players) == 3
+    assert db.save_players(players) == 0
+
+    players[1] = {**players[1], 'running': 5}
+    assert db.save_players(players) == 1
+    assert db.save_players(players + roster('Dee')) == 1  # new players go after the rest
+    assert db.save_players(players) == 1  # removing Dee leaves the others alone
+    assert db.load_players() == players
+
+    # A reordered roster is renumbered; Ben keeps seq 1, so his row is not rewritten
+    assert db.save_players(players[::-1]) == 2
+    assert [p['name'] for p in db.load_players()] == ['Cy', 'Ben', 'Ana']
+
+
+def test_players_with_ids_keep_their_row_through_a_rename(tmp_path):
+    db = LocalDB(str(tmp_path / 'team.db'))
+    db.save_players([{'id': 7, 'name': 'Ana'}, {'id': 8, 'name': 'Ben'}])
+
+    assert db.save_players([{'id': 7, 'name': 'Anna'}, {'id': 8, 'name': 'Ben'}]) == 1
+    assert db.find_players('Anna') == [{'id': 7, 'name': 'Anna'}]
+    assert db.find_players('Ana') == []
+
+
+def test_relation_saves_keep_unchanged_pairs(tmp_path):
+    db = LocalDB(str(tmp_path / 'team.db'))
+    db.save_relations('partnerships', {'Ana': ['Ben', 'Cy']})
+    db.save_relations('partnerships', {'Ana': ['Cy'], 'Ben': ['Dee']})
+
+    assert db.load_relations('partnerships') == {'Ana': ['Cy'], 'Ben': ['Dee']}
+    assert db.related('partnerships', 'Ana') == ['Cy']
+
+
+def test_migrate_copies_the_json_files_once(tmp_path):
+    players_file, games_file = tmp_path / 'players.json', tmp_path / 'games.json'
+    conflicts_file = tmp_path / 'conflicts.json'
+    players_file.write_text(json.dumps(roster('Ana', 'Ben')))
+    # The apps kept games newest first
+    games_file.write_text(json.dumps([
+        {'id': 'g2', 'teams': [['Ana'], ['Ben']]},
+        {'id': 'g1', 'teams': [['Ben'], ['Ana']]}
+    ]))
+    conflicts_file.write_text(json.dumps({'Ana': ['Ben']}))
+    path = str(tmp_path / 'team.db')
+
+    db = LocalDB(path)
+    assert db.migrate(str(players_file), str(games_file), conflicts_file=str(conflicts_file))
+    assert db.load_players() == roster('Ana', 'Ben')
+    assert [game['id'] for game in db.games.load()] == ['g2', 'g1']
+    assert [game['id'] for game in db.games.with_player('Ana')] == ['g2', 'g1']
+    assert db.load_relations('conflicts') == {'Ana': ['Ben']}
+
+    # Already migrated, also as seen from another connection
+    players_file.write_text(json.dumps(roster('Cy')))
+    assert not LocalDB(path).migrate(str(players_file))
+    assert db.load_players() == roster('Ana', 'Ben')
+
+
+def test_migrate_reads_the_game_log_instead_of_the_json_history(tmp_path):
+    games_file = str(tmp_path / 'games.json')
+    log = GameLog(games_file)
+    log.append({'id': 'g1', 'teams': [['Ana'], ['Ben']]})
+    log.append({'id': 'g2', 'teams': [['Ben'], ['Ana']]})
+    log.delete('g1')
+
+    db = LocalDB(str(tmp_path / 'team.db'))
+    assert db.migrate(games_file=games_file)
+    assert [game['id'] for game in db.games.load()] == ['g2']
+    assert db.games.delete('g2') and not db.games.delete('g2')
+    assert db.games.count() == 0
@@ -0,0 +1,41 @@
+import itertools
+import random
+
+import pytest
+
+from partitioning import assignment_spread, partition_balanced, range_lower_bound, team_sizes
+
+
+def brute_force_range(scores, num_teams):
+    min_size, max_size, _ = team_sizes(len(scores), num_teams)
+    best = None
+    for assignment in itertools.product(range(num_teams), repeat=len(scores)):
+        sizes = [assignment.count(team) for team in range(num_teams)]
+        if min(sizes) < min_size or max(sizes) > max_size:
+            continue
+        spread = assignment_spread(scores, assignment, num_teams)
+        best = spread if best is None else min(best, spread)
+    return best
+
+
+@pytest.mark.parametrize('n_items,num_teams', [(4, 2), (5, 2), (7, 2), (6, 3), (7, 3), (8, 3), (8, 4)])
+@pytest.mark.parametrize('seed', range(5))
+def test_matches_brute_force_on_small_rosters(n_items, num_teams, seed):
+    rng = random.Random(seed)
+    scores = [rng.randint(100, 1000) for _ in range(n_items)]
+
+    result = partition_balanced(scores, num_teams)
+
+    assert result['optimal']
+    assert result['range'] == brute_force_range(scores, num_teams)
+    assert assignment_spread(scores, result['assignment'], num_teams) == result['range']
+    min_size, max_size, _ = team_sizes(n_items, num_teams)
+    sizes = [result['assignment'].count(team) for team in range(num_teams)]
+    assert min_size <= min(sizes) and max(sizes) <= max_size
+
+
+def test_lower_bound_is_never_above_the_optimum():
+    rng = random.Random(7)
+    for _ in range(20):
+        scores = [rng.randrange(0, 500, 25) for _ in range(6)]
+        assert range_lower_bound(scores, 3) <= brute_force_range(scores, 3)
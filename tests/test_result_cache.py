@@ -0,0 +1,70 @@
+from result_cache import ResultCache, balance_fingerprint
+
+
+def test_least_recently_used_entry_is_evicted():
+    cache = ResultCache(max_entries=2)
+    cache.put('a', 1)
+    cache.put('b', 2)
+    assert cache.get('a') == 1  # 'b' is now the least recently used
+
+    cache.put('c', 3)
+
+    assert cache.get('b') is None
+    assert cache.get('a') == 1 and cache.get('c') == 3
+    assert (cache.hits, cache.misses) == (3, 1)
+
+
+def test_entries_and_their_order_survive_a_restart(tmp_path):
+    path = str(tmp_path / 'cache.json')
+    cache = ResultCache(path, max_entries=2)
+    cache.put('a', 1)
+    cache.put('b', 2)
+    cache.get('a')
+    cache.put('a', 1)  # saves with 'a' most recently used
+
+    reopened = ResultCache(path, max_entries=2)
+    reopened.put('c', 3)
+
+    assert reopened.get('b') is None
+    assert reopened.get('a') == 1 and reopened.get('c') == 3
+
+
+def test_saves_merge_entries_other_processes_wrote(tmp_path):
+    path = str(tmp_path / 'cache.json')
+    first, second = ResultCache(path), ResultCache(path)
+    first.put('a', 1)
+    second.put('b', 2)
+    first.put('c', 3)
+
+    merged = ResultCache(path)
+    assert (merged.get('a'), merged.get('b'), merged.get('c')) == (1, 2, 3)
+
+
+def test_merge_keeps_the_newest_entries_within_the_limit(tmp_path):
+    path = str(tmp_path / 'cache.json')
+    first, second = ResultCache(path, max_entries=2), ResultCache(path, max_entries=2)
+    second.put('theirs', 0)
+    first.put('a', 1)
+    first.put('b', 2)
+
+    merged = ResultCache(path, max_entries=2)
+    assert merged.get('theirs') is None
+    assert (merged.get('a'), merged.get('b')) == (1, 2)
+
+
+def test_clear_does_not_bring_back_stored_entries(tmp_path):
+    path = str(tmp_path / 'cache.json')
+    cache = ResultCache(path)
+    cache.put('a', 1)
+    cache.clear()
+
+    assert len(ResultCache(path)) == 0
+
+
+def test_fingerprint_ignores_order_and_unrelated_relations():
+    players = [{'name': 'Ana', 'running': 4}, {'name': 'Ben', 'running': 2}, {'name': 'Cy', 'running': 3}]
+    key = balance_fingerprint(players, 2, partnerships={'Ana': ['Ben']})
+
+    assert balance_fingerprint(players[::-1], 2, partnerships={'Ben': ['Ana'], 'Ana': ['Zed']}) == key
+    assert balance_fingerprint(players, 3, partnerships={'Ana': ['Ben']}) != key
+    assert balance_fingerprint(players, 2, conflicts={'Ana': ['Ben']}) != key
@@ -0,0 +1,28 @@
+from collections import Counter
+
+from season import balance_matchday, pair_key, plan_season
+
+
+def tied_roster(names):
+    return [{'name': name, 'position': 'Midfielder'} for name in names]
+
+
+def test_tied_players_rotate_away_from_past_teammates():
+    players = tied_roster('ABCD')
+    counts = Counter({pair_key('A', 'B'): 3, pair_key('C', 'D'): 3})
+
+    teams, stats = balance_matchday(players, 2, counts, {'season_time_limit': 2.0})
+
+    assert stats['repeats'] == 0
+    assert stats['range'] == 0
+    lineup = {frozenset(p['name'] for p in team) for team in teams}
+    assert frozenset('AB') not in lineup and frozenset('CD') not in lineup
+
+
+def test_identical_weeks_do_not_repeat_the_same_lineup():
+    roster = tied_roster('ABCD')
+    plan, stats = plan_season(roster, [list('ABCD')] * 3, 2, settings={'season_time_limit': 2.0})
+
+    lineups = [frozenset(frozenset(p['name'] for p in team) for team in teams) for teams, _ in plan]
+    assert len(set(lineups)) == 3
+    assert stats['max_together'] == 1
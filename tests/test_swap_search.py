@@ -0,0 +1,79 @@
+import itertools
+import random
+
+import pytest
+
+from partitioning import assignment_spread, team_sizes
+from swap_search import swap_search
+
+
+def sum_of_squares(scores, assignment, num_teams):
+    totals = [0] * num_teams
+    for score, team in zip(scores, assignment):
+        totals[team] += score
+    return sum(total * total for total in totals)
+
+
+def neighbours(scores, assignment, num_teams, locked):
+    """Every lineup one swap or one size-respecting move away"""
+    min_size, max_size, _ = team_sizes(len(scores), num_teams)
+    sizes = [assignment.count(team) for team in range(num_teams)]
+    movable = [i for i in range(len(scores)) if i not in locked]
+    for i, j in itertools.combinations(movable, 2):
+        if assignment[i] != assignment[j]:
+            swapped = list(assignment)
+            swapped[i], swapped[j] = assignment[j], assignment[i]
+            yield swapped
+    for i in movable:
+        for team in range(num_teams):
+            if team != assignment[i] and sizes[assignment[i]] > min_size and sizes[team] < max_size:
+                moved = list(assignment)
+                moved[i] = team
+                yield moved
+
+
+def steps(limit):
+    """stop= callable that lets the search apply at most limit steps"""
+    calls = itertools.count()
+    return lambda: next(calls) >= limit
+
+
+def random_lineup(rng, n_players, num_teams):
+    scores = [rng.randint(100, 1000) for _ in range(n_players)]
+    assignment = [i % num_teams for i in range(n_players)]
+    rng.shuffle(assignment)
+    return scores, assignment
+
+
+@pytest.mark.parametrize('n_players,num_teams', [(8, 2), (9, 2), (10, 3), (11, 3)])
+@pytest.mark.parametrize('seed', range(5))
+def test_each_step_takes_the_best_neighbour(n_players, num_teams, seed):
+    rng = random.Random(seed)
+    scores, assignment = random_lineup(rng, n_players, num_teams)
+    locked = {0}
+
+    current = assignment
+    for limit in range(1, 4):
+        after, stats = swap_search(scores, num_teams, assignment, locked, time_limit=10.0, stop=steps(limit))
+        if stats['swaps'] + stats['moves'] < limit:
+            break  # lower bound or local optimum reached
+        best = min(sum_of_squares(scores, other, num_teams) for other in neighbours(scores, current, num_teams, locked))
+        assert sum_of_squares(scores, after, num_teams) == best
+        assert best < sum_of_squares(scores, current, num_teams)
+        current = after
+
+
+@pytest.mark.parametrize('seed', range(5))
+def test_result_keeps_locks_and_sizes_and_reports_its_range(seed):
+    rng = random.Random(seed)
+    scores, assignment = random_lineup(rng, 23, 4)
+    locked = [0, 5, 9]
+
+    after, stats = swap_search(scores, 4, assignment, locked, time_limit=10.0)
+
+    assert all(after[i] == assignment[i] for i in locked)
+    min_size, max_size, _ = team_sizes(len(scores), 4)
+    sizes = [after.count(team) for team in range(4)]
+    assert min_size <= min(sizes) and max(sizes) <= max_size
+    assert stats['range'] == assignment_spread(scores, after, 4) / 100
+    assert stats['range'] <= assignment_spread(scores, assignment, 4) / 100